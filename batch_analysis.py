@@ -0,0 +1,233 @@
+import argparse
+import json
+import multiprocessing
+import sys
+import time
+from collections import deque
+from itertools import islice
+
+from board_and_game import ChessGame
+from engine import perft, search
+
+
+class BatchAnalyzer:
+    """Класс для потокового анализа большого файла позиций в пуле процессов."""
+
+    # Возможные виды анализа
+    MOVES_TASK = "moves"
+    PERFT_TASK = "perft"
+    SEARCH_TASK = "search"
+    TASKS = (MOVES_TASK, PERFT_TASK, SEARCH_TASK)
+
+    def __init__(self, task, depth=1, workers=None, chunk_size=64, window=None, progress_interval=5.0):
+        """
+        Инициализирует анализатор.
+
+        Args:
+            task (str): Вид анализа: 'moves', 'perft' или 'search'.
+            depth (int): Глубина для perft и поиска. По умолчанию 1.
+            workers (int): Количество процессов. По умолчанию — число ядер.
+            chunk_size (int): Количество позиций в одной задаче процесса. По умолчанию 64.
+            window (int): Максимальное количество задач в обработке одновременно,
+                          ограничивает расход памяти. По умолчанию — 4 задачи на процесс.
+            progress_interval (float): Интервал вывода прогресса в stderr в секундах.
+
+        Raises:
+            ValueError: Если вид анализа неизвестен или параметры вне допустимых значений.
+        """
+        if task not in self.TASKS:
+            raise ValueError(f"Invalid task. Choose one of: {', '.join(self.TASKS)}.")
+        if depth < self.min_depth(task):
+            raise ValueError(f"Depth for '{task}' must be at least {self.min_depth(task)}.")
+        if workers is not None and workers < 1:
+            raise ValueError("Number of workers must be at least 1.")
+        if chunk_size < 1:
+            raise ValueError("Chunk size must be at least 1.")
+        if window is not None and window < 1:
+            raise ValueError("Window must be at least 1.")
+        self.task = task
+        self.depth = depth
+        self.workers = workers or multiprocessing.cpu_count()
+        self.chunk_size = chunk_size
+        self.window = window or self.workers * 4
+        self.progress_interval = progress_interval
+
+    @classmethod
+    def min_depth(cls, task):
+        """
+        Возвращает минимальную допустимую глубину для вида анализа.
+
+        Args:
+            task (str): Вид анализа.
+
+        Returns:
+            int: Минимальная глубина.
+        """
+        return 1 if task == cls.SEARCH_TASK else 0
+
+    def run(self, source, output, progress=sys.stderr):
+        """
+        Анализирует позиции из потока и записывает результаты в формате JSONL в порядке входа.
+
+        Args:
+            source: Текстовый поток с позициями, по одной на строку.
+            output: Текстовый поток для результатов.
+            progress: Поток для сообщений о прогрессе.
+
+        Returns:
+            int: Количество обработанных позиций.
+        """
+        chunks = self._read_chunks(source)
+        pending = deque()
+        done = 0
+        started = last_report = time.monotonic()
+
+        with multiprocessing.Pool(self.workers) as pool:
+            for chunk in islice(chunks, self.window):
+                pending.append(pool.apply_async(analyse_chunk, (self.task, self.depth, chunk)))
+
+            while pending:
+                results = pending.popleft().get()
+                for chunk in islice(chunks, 1):
+                    pending.append(pool.apply_async(analyse_chunk, (self.task, self.depth, chunk)))
+                output.write("".join(line + "\n" for line in results))
+                done += len(results)
+
+                now = time.monotonic()
+                if now - last_report >= self.progress_interval:
+                    self._report(progress, done, now - started)
+                    last_report = now
+
+        output.flush()
+        self._report(progress, done, time.monotonic() - started)
+        return done
+
+    def _read_chunks(self, source):
+        """
+        Читает поток построчно и группирует непустые строки в задачи.
+
+        Args:
+            source: Текстовый поток с позициями.
+
+        Returns:
+            generator: Списки в формате [(номер строки, позиция), ...].
+        """
+        lines = ((number, line.strip()) for number, line in enumerate(source, start=1))
+        lines = ((number, line) for number, line in lines if line and not line.startswith('#'))
+        while True:
+            chunk = list(islice(lines, self.chunk_size))
+            if not chunk:
+                return
+            yield chunk
+
+    def _report(self, progress, done, elapsed):
+        """
+        Выводит количество обработанных позиций и скорость.
+
+        Args:
+            progress: Поток для сообщений о прогрессе.
+            done (int): Количество обработанных позиций.
+            elapsed (float): Прошедшее время в секундах.
+
+        Returns:
+            None
+        """
+        rate = done / elapsed if elapsed > 0 else 0.0
+        print(f"{done} positions, {elapsed:.1f}s, {rate:.1f} positions/s", file=progress, flush=True)
+
+
+def analyse_position(task, depth, position):
+    """
+    Анализирует одну позицию.
+
+    Args:
+        task (str): Вид анализа: 'moves', 'perft' или 'search'.
+        depth (int): Глубина для perft и поиска.
+        position (str): Текстовая позиция (см. ChessGame.from_position).
+
+    Returns:
+        dict: Результат анализа.
+    """
+    game = ChessGame.from_position(position)
+    if task == BatchAnalyzer.MOVES_TASK:
+        moves = game.board.legal_moves(game.current_player)
+        return {"moves": [
+            game.format_position(start) + game.format_position(end)
+            for start, ends in moves.items() for end in ends
+        ]}
+    if task == BatchAnalyzer.PERFT_TASK:
+        return {"depth": depth, "nodes": perft(game, depth)}
+    score, move = search(game, depth)
+    best = game.format_position(move[0]) + game.format_position(move[1]) if move else None
+    return {"depth": depth, "score": score, "best_move": best}
+
+
+def analyse_chunk(task, depth, chunk):
+    """
+    Анализирует группу позиций в процессе пула.
+
+    Ошибка в одной позиции записывается в её результат и не прерывает обработку остальных.
+
+    Args:
+        task (str): Вид анализа: 'moves', 'perft' или 'search'.
+        depth (int): Глубина для perft и поиска.
+        chunk (list): Позиции в формате [(номер строки, позиция), ...].
+
+    Returns:
+        list: Строки JSON с результатами в порядке входа.
+    """
+    results = []
+    for number, position in chunk:
+        record = {"line": number, "position": position}
+        try:
+            record.update(analyse_position(task, depth, position))
+        except Exception as e:
+            record["error"] = f"{type(e).__name__}: {e}"
+        results.append(json.dumps(record))
+    return results
+
+
+def main(argv=None):
+    """
+    Точка входа командной строки.
+
+    Args:
+        argv (list): Аргументы командной строки. По умолчанию sys.argv[1:].
+
+    Returns:
+        int: Код завершения.
+    """
+    parser = argparse.ArgumentParser(description="Analyse a file of positions and write JSONL results.")
+    parser.add_argument("input", help="file with one position per line ('-' for stdin)")
+    parser.add_argument("-o", "--output", default="-", help="JSONL output file ('-' for stdout)")
+    parser.add_argument("-t", "--task", choices=BatchAnalyzer.TASKS, default=BatchAnalyzer.MOVES_TASK)
+    parser.add_argument("-d", "--depth", type=int, default=1, help="perft/search depth in plies")
+    parser.add_argument("-j", "--workers", type=int, default=None, help="number of worker processes")
+    parser.add_argument("--chunk-size", type=int, default=64, help="positions per worker task")
+    parser.add_argument("--window", type=int, default=None, help="maximum tasks in flight")
+    parser.add_argument("--progress-interval", type=float, default=5.0, help="seconds between progress reports")
+    args = parser.parse_args(argv)
+    if args.depth < BatchAnalyzer.min_depth(args.task):
+        parser.error(f"--depth for '{args.task}' must be at least {BatchAnalyzer.min_depth(args.task)}")
+    for option, value in (("--workers", args.workers), ("--chunk-size", args.chunk_size), ("--window", args.window)):
+        if value is not None and value < 1:
+            parser.error(f"{option} must be at least 1")
+
+    analyzer = BatchAnalyzer(
+        args.task, depth=args.depth, workers=args.workers, chunk_size=args.chunk_size,
+        window=args.window, progress_interval=args.progress_interval,
+    )
+    source = sys.stdin if args.input == "-" else open(args.input, encoding="utf-8")
+    output = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8")
+    try:
+        analyzer.run(source, output)
+    finally:
+        if source is not sys.stdin:
+            source.close()
+        if output is not sys.stdout:
+            output.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
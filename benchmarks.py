@@ -0,0 +1,419 @@
+import argparse
+import io
+import json
+import math
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import timeit
+from contextlib import redirect_stdout
+from datetime import datetime, timezone
+
+from board_and_game import PIECE_CLASSES, Board, ChessGame
+
+
+# Клетка d4, на которую ставится фигура в замерах valid_moves.
+CENTER = (4, 3)
+
+
+class NullStream(io.TextIOBase):
+    """Класс текстового потока, отбрасывающего всё записанное."""
+
+    def write(self, text):
+        """
+        Отбрасывает текст.
+
+        Args:
+            text (str): Записываемый текст.
+
+        Returns:
+            int: Длина текста.
+        """
+        return len(text)
+
+
+def bench_valid_moves(piece_class):
+    """
+    Готовит замер valid_moves фигуры в центре доски начальной расстановки.
+
+    Args:
+        piece_class (type): Класс фигуры.
+
+    Returns:
+        callable: Функция без аргументов для замера.
+    """
+    mode = "checkers" if piece_class.__name__ == "CheckerPiece" else "modified_chess"
+    board = Board(mode=mode)
+    piece = piece_class('white')
+    board.set_piece(*CENTER, piece)
+    return lambda: piece.valid_moves(board.board, CENTER)
+
+
+def bench_make_undo(mode, start, end):
+    """
+    Готовит замер пары make_move/undo_move из начальной позиции.
+
+    Args:
+        mode (str): Режим игры.
+        start (str): Начальная позиция фигуры в формате 'e2'.
+        end (str): Конечная позиция фигуры в формате 'e4'.
+
+    Returns:
+        callable: Функция без аргументов для замера.
+    """
+    game = ChessGame(mode=mode)
+
+    def make_undo():
+        game.make_move(start, end)
+        game.undo_move()
+
+    return make_undo
+
+
+def bench_setup_board(mode):
+    """
+    Готовит замер Board.setup_board.
+
+    Args:
+        mode (str): Режим игры.
+
+    Returns:
+        callable: Функция без аргументов для замера.
+    """
+    board = Board(mode=mode)
+    return board.setup_board
+
+
+def bench_snapshot(mode):
+    """
+    Готовит замер Board.snapshot после изменения одной горизонтали.
+
+    Args:
+        mode (str): Режим игры.
+
+    Returns:
+        callable: Функция без аргументов для замера.
+    """
+    board = Board(mode=mode)
+
+    def snapshot():
+        board.set_piece(*CENTER, None)
+        board.snapshot()
+
+    return snapshot
+
+
+def bench_parse_position():
+    """
+    Готовит замер ChessGame.parse_position.
+
+    Returns:
+        callable: Функция без аргументов для замера.
+    """
+    game = ChessGame()
+    return lambda: game.parse_position("e2")
+
+
+def bench_display(mode):
+    """
+    Готовит замер Board.display с выводом в пустой поток.
+
+    Args:
+        mode (str): Режим игры.
+
+    Returns:
+        callable: Функция без аргументов для замера.
+    """
+    board = Board(mode=mode)
+    null = NullStream()
+
+    def display():
+        with redirect_stdout(null):
+            board.display()
+
+    return display
+
+
+BENCHMARKS = {
+    **{f"valid_moves.{cls.__name__}": (lambda cls=cls: bench_valid_moves(cls)) for cls in PIECE_CLASSES.values()},
+    "make_undo.chess": lambda: bench_make_undo("chess", "e2", "e4"),
+    "make_undo.checkers": lambda: bench_make_undo("checkers", "a3", "b4"),
+    "make_undo.modified_chess": lambda: bench_make_undo("modified_chess", "e2", "e4"),
+    "setup_board.chess": lambda: bench_setup_board("chess"),
+    "setup_board.checkers": lambda: bench_setup_board("checkers"),
+    "setup_board.modified_chess": lambda: bench_setup_board("modified_chess"),
+    "snapshot.modified_chess": lambda: bench_snapshot("modified_chess"),
+    "parse_position": bench_parse_position,
+    "display.chess": lambda: bench_display("chess"),
+    "display.checkers": lambda: bench_display("checkers"),
+    "display.modified_chess": lambda: bench_display("modified_chess"),
+}
+
+
+def machine_metadata():
+    """
+    Собирает сведения о машине и версии кода для сохранения вместе с результатами.
+
+    Returns:
+        dict: Метаданные замера.
+    """
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "processor": platform.processor(),
+        "cpu_count": os.cpu_count(),
+        "commit": commit,
+    }
+
+
+def run_benchmarks(names=None, repeat=15, min_time=0.05):
+    """
+    Выполняет замеры.
+
+    Каждый замер повторяется repeat раз; в одном повторе функция вызывается столько раз,
+    чтобы он длился не меньше min_time секунд.
+
+    Args:
+        names (list): Имена замеров. По умолчанию (None) — все.
+        repeat (int): Количество повторов, не меньше 2. По умолчанию 15.
+        min_time (float): Минимальная длительность одного повтора в секундах.
+
+    Raises:
+        ValueError: Если повторов меньше 2.
+
+    Returns:
+        dict: Результаты в формате {'metadata': {...}, 'results': {имя: {...}}}.
+    """
+    if repeat < 2:
+        raise ValueError("At least 2 repeats are needed to compare results.")
+    results = {}
+    for name in BENCHMARKS if names is None else names:
+        func = BENCHMARKS[name]()
+        timer = timeit.Timer(func)
+        number = 1
+        while timer.timeit(number) < min_time:
+            number *= 2
+        samples = [total / number for total in timer.repeat(repeat=repeat, number=number)]
+        results[name] = {
+            "number": number,
+            "samples": samples,
+            "mean": statistics.fmean(samples),
+            "stdev": statistics.stdev(samples),
+            "min": min(samples),
+        }
+    return {"metadata": machine_metadata(), "results": results}
+
+
+def welch_t(baseline, current):
+    """
+    Вычисляет t-статистику Уэлча для разницы средних двух выборок.
+
+    Args:
+        baseline (list): Выборка базового замера.
+        current (list): Выборка текущего замера.
+
+    Returns:
+        float: t-статистика (положительная, если текущий замер медленнее).
+    """
+    var_b = statistics.variance(baseline) / len(baseline)
+    var_c = statistics.variance(current) / len(current)
+    diff = statistics.fmean(current) - statistics.fmean(baseline)
+    if var_b + var_c == 0:
+        return math.inf if diff > 0 else -math.inf if diff < 0 else 0.0
+    return diff / math.sqrt(var_b + var_c)
+
+
+def welch_df(baseline, current):
+    """
+    Вычисляет число степеней свободы Уэлча — Саттертуэйта для двух выборок.
+
+    Args:
+        baseline (list): Выборка базового замера.
+        current (list): Выборка текущего замера.
+
+    Returns:
+        float: Число степеней свободы (math.inf, если обе выборки постоянны).
+    """
+    var_b = statistics.variance(baseline) / len(baseline)
+    var_c = statistics.variance(current) / len(current)
+    denominator = var_b ** 2 / (len(baseline) - 1) + var_c ** 2 / (len(current) - 1)
+    if denominator == 0:
+        return math.inf
+    return (var_b + var_c) ** 2 / denominator
+
+
+def _incomplete_beta(a, b, x):
+    """
+    Вычисляет регуляризованную неполную бета-функцию I_x(a, b) цепной дробью.
+
+    Args:
+        a (float): Первый параметр.
+        b (float): Второй параметр.
+        x (float): Аргумент от 0 до 1.
+
+    Returns:
+        float: Значение функции.
+    """
+    if x <= 0.0:
+        return 0.0
+    if x >= 1.0:
+        return 1.0
+    if x > (a + 1) / (a + b + 2):
+        return 1.0 - _incomplete_beta(b, a, 1.0 - x)
+    front = math.exp(math.lgamma(a + b) - math.lgamma(a) - math.lgamma(b)
+                     + a * math.log(x) + b * math.log1p(-x)) / a
+    # Цепная дробь методом Лентца.
+    tiny = 1e-300
+    c, d = 1.0, 1.0 - (a + b) * x / (a + 1)
+    d = 1.0 / (d if abs(d) > tiny else tiny)
+    result = d
+    for m in range(1, 300):
+        for numerator in (
+            m * (b - m) * x / ((a + 2 * m - 1) * (a + 2 * m)),
+            -(a + m) * (a + b + m) * x / ((a + 2 * m) * (a + 2 * m + 1)),
+        ):
+            d = 1.0 + numerator * d
+            d = 1.0 / (d if abs(d) > tiny else tiny)
+            c = 1.0 + numerator / c
+            c = c if abs(c) > tiny else tiny
+            result *= c * d
+        if abs(c * d - 1.0) < 1e-12:
+            break
+    return front * result
+
+
+def t_sf(t, df):
+    """
+    Вычисляет вероятность того, что величина с распределением Стьюдента превысит t.
+
+    Args:
+        t (float): Значение статистики.
+        df (float): Число степеней свободы (math.inf — нормальное распределение).
+
+    Returns:
+        float: Односторонний p-уровень.
+    """
+    if math.isinf(t):
+        return 0.0 if t > 0 else 1.0
+    if math.isinf(df):
+        return 0.5 * math.erfc(t / math.sqrt(2))
+    tail = 0.5 * _incomplete_beta(df / 2, 0.5, df / (df + t * t))
+    return tail if t > 0 else 1.0 - tail
+
+
+def compare(baseline, current, threshold=0.05, alpha=0.001):
+    """
+    Сравнивает результаты с базовыми и находит статистически значимые замедления.
+
+    Замедлением считается рост среднего времени больше чем на threshold, если
+    односторонний p-уровень t-критерия Уэлча (со степенями свободы Уэлча — Саттертуэйта)
+    меньше alpha. При малом числе повторов порог t растёт, и замедления отмечаются реже.
+
+    Args:
+        baseline (dict): Базовые результаты (см. run_benchmarks).
+        current (dict): Текущие результаты.
+        threshold (float): Минимальное относительное замедление. По умолчанию 5%.
+        alpha (float): Уровень значимости. По умолчанию 0.001.
+
+    Returns:
+        list: Строки сравнения в формате [(имя, отношение, t, p, замедление), ...].
+    """
+    rows = []
+    for name, result in current["results"].items():
+        base = baseline["results"].get(name)
+        if base is None:
+            continue
+        ratio = result["mean"] / base["mean"]
+        t = welch_t(base["samples"], result["samples"])
+        p = t_sf(t, welch_df(base["samples"], result["samples"]))
+        rows.append((name, ratio, t, p, ratio > 1 + threshold and p < alpha))
+    return rows
+
+
+def main(argv=None):
+    """
+    Точка входа командной строки.
+
+    Args:
+        argv (list): Аргументы командной строки. По умолчанию sys.argv[1:].
+
+    Returns:
+        int: Код завершения: 1, если найдены замедления, иначе 0.
+    """
+    parser = argparse.ArgumentParser(description="Micro-benchmarks for the hot board and game operations.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="run benchmarks and save the results as JSON")
+    run_parser.add_argument("-o", "--output", default="-", help="results file ('-' for stdout)")
+
+    compare_parser = commands.add_parser("compare", help="compare results with a stored baseline")
+    compare_parser.add_argument("baseline", help="baseline results file")
+    compare_parser.add_argument("current", nargs="?", help="results file to compare (default: run now)")
+    compare_parser.add_argument("--threshold", type=float, default=0.05, help="minimum relative slowdown")
+    compare_parser.add_argument("--alpha", type=float, default=0.001, help="one-sided significance level")
+
+    for sub in (run_parser, compare_parser):
+        sub.add_argument("-k", "--filter", default="", help="run only benchmarks whose name contains this text")
+        sub.add_argument("--repeat", type=int, default=15, help="samples per benchmark")
+        sub.add_argument("--min-time", type=float, default=0.05, help="minimum seconds per sample")
+    args = parser.parse_args(argv)
+
+    if args.repeat < 2:
+        parser.error("--repeat must be at least 2")
+    if args.command == "compare" and not 0 < args.alpha < 1:
+        parser.error("--alpha must be between 0 and 1")
+    names = [name for name in BENCHMARKS if args.filter in name]
+    if not names:
+        parser.error(f"no benchmarks match {args.filter!r}")
+
+    if args.command == "run":
+        results = run_benchmarks(names, repeat=args.repeat, min_time=args.min_time)
+        text = json.dumps(results, indent=2)
+        if args.output == "-":
+            print(text)
+        else:
+            with open(args.output, "w", encoding="utf-8") as f:
+                f.write(text + "\n")
+        for name, result in results["results"].items():
+            print(f"{name:32} {result['mean'] * 1e6:10.3f} us ± {result['stdev'] * 1e6:.3f}", file=sys.stderr)
+        return 0
+
+    with open(args.baseline, encoding="utf-8") as f:
+        baseline = json.load(f)
+    names = [name for name in names if name in baseline["results"]]
+    if args.current:
+        with open(args.current, encoding="utf-8") as f:
+            current = json.load(f)
+        names = [name for name in names if name in current["results"]]
+        if not names:
+            parser.error("no selected benchmarks are present in both results files")
+        current["results"] = {name: current["results"][name] for name in names}
+    else:
+        if not names:
+            parser.error("no selected benchmarks are present in the baseline")
+        current = run_benchmarks(names, repeat=args.repeat, min_time=args.min_time)
+    if baseline["metadata"].get("platform") != current["metadata"].get("platform"):
+        print("warning: baseline was recorded on a different platform", file=sys.stderr)
+
+    regressions = 0
+    for name, ratio, t, p, slower in compare(baseline, current, args.threshold, args.alpha):
+        mark = "SLOWER" if slower else ""
+        print(f"{name:32} {ratio:7.3f}x  t={t:8.2f}  p={p:.2g}  {mark}")
+        regressions += slower
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
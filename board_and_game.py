@@ -1,7 +1,17 @@
 from soft_pieces import *
 from new_pieces import Wizard, Hunter, Guardian
 from for_checkers import CheckerPiece
+from move_cache import MoveCache
+from position_hash import compute_hash, piece_key, side_hash
 import sys
+from types import MappingProxyType
+
+
+# Классы фигур по символу белой фигуры (чёрные обозначаются строчными буквами).
+PIECE_CLASSES = {
+    'P': Pawn, 'N': Knight, 'B': Bishop, 'R': Rook, 'Q': Queen, 'K': King,
+    'W': Wizard, 'H': Hunter, 'G': Guardian, 'C': CheckerPiece,
+}
 
 
 class Board:
@@ -18,6 +28,10 @@ class Board:
         self.board = [[None for _ in range(8)] for _ in range(8)]
         self.mode = mode
         self.hints = set()
+        self.hash = 0
+        self.piece_squares = {'white': {}, 'black': {}}
+        self.move_cache = MoveCache()
+        self._row_tuples = [None] * 8
         self.setup_board()
 
     def setup_board(self):
@@ -65,6 +79,266 @@ class Board:
             self.board[7][3] = Guardian('white')
         else:
             raise ValueError("Invalid mode. Choose 'chess', 'checkers' or 'modified_chess'.")
+        self.hash = compute_hash(self.board)
+        self.piece_squares = {'white': {}, 'black': {}}
+        for x in range(8):
+            for y in range(8):
+                piece = self.board[x][y]
+                if piece is not None:
+                    self.piece_squares[piece.color].setdefault(type(piece), set()).add((x, y))
+        self._row_tuples = [None] * 8
+
+    def load_placement(self, placement):
+        """
+        Расставляет фигуры по строке расстановки.
+
+        Строка состоит из 8 горизонталей (от 8-й к 1-й), разделённых '/'.
+        Фигура обозначается своим символом, цифра задаёт число пустых клеток подряд,
+        например 'rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR'.
+
+        Args:
+            placement (str): Строка расстановки.
+
+        Raises:
+            ValueError: Если строка расстановки некорректна.
+
+        Returns:
+            None
+        """
+        rows = placement.split('/')
+        if len(rows) != 8:
+            raise ValueError(f"Invalid placement: expected 8 ranks, got {len(rows)}.")
+        parsed = []
+        for row in rows:
+            squares = []
+            for char in row:
+                if char.isdigit():
+                    squares.extend([None] * int(char))
+                elif char.upper() in PIECE_CLASSES:
+                    squares.append(PIECE_CLASSES[char.upper()]('white' if char.isupper() else 'black'))
+                else:
+                    raise ValueError(f"Invalid piece symbol: {char!r}.")
+            if len(squares) != 8:
+                raise ValueError(f"Invalid placement rank: {row!r}.")
+            parsed.append(squares)
+        for x in range(8):
+            for y in range(8):
+                self.set_piece(x, y, parsed[x][y])
+
+    def placement(self):
+        """
+        Возвращает строку расстановки фигур (см. load_placement).
+
+        Returns:
+            str: Строка расстановки.
+        """
+        rows = []
+        for row in self.board:
+            text = ""
+            empty = 0
+            for piece in row:
+                if piece is None:
+                    empty += 1
+                    continue
+                if empty:
+                    text += str(empty)
+                    empty = 0
+                text += piece.symbol
+            if empty:
+                text += str(empty)
+            rows.append(text)
+        return "/".join(rows)
+
+    def set_piece(self, x, y, piece):
+        """
+        Ставит фигуру на клетку (или очищает её), обновляя хэш позиции и списки фигур.
+
+        Args:
+            x (int): Номер строки доски.
+            y (int): Номер столбца доски.
+            piece: Фигура или None.
+
+        Returns:
+            None
+        """
+        old = self.board[x][y]
+        if old is not None:
+            self.piece_squares[old.color][type(old)].discard((x, y))
+        if piece is not None:
+            self.piece_squares[piece.color].setdefault(type(piece), set()).add((x, y))
+        self.hash ^= piece_key(old, x, y) ^ piece_key(piece, x, y)
+        self.board[x][y] = piece
+        self._row_tuples[x] = None
+
+    def snapshot(self, current_player=None):
+        """
+        Возвращает неизменяемый снимок доски.
+
+        Горизонтали снимка — кортежи, общие для снимков, между которыми горизонталь
+        не менялась: копируются только горизонтали, изменённые после предыдущего снимка.
+        Кулдауны Волшебников фиксируются в снимке, поэтому ходы снимка не зависят от
+        последующих изменений фигур. Снимок нужно брать в потоке, который изменяет доску;
+        читать его можно из любого потока.
+
+        Args:
+            current_player (str): Игрок, чья очередь хода. По умолчанию не указан.
+
+        Returns:
+            BoardSnapshot: Снимок доски.
+        """
+        rows = self._row_tuples
+        for x in range(8):
+            if rows[x] is None:
+                rows[x] = tuple(self.board[x])
+        cooldowns = {
+            (x, y): self.board[x][y].teleport_cooldown
+            for color in ('white', 'black')
+            for x, y in self.piece_squares[color].get(Wizard, ())
+        }
+        return BoardSnapshot(tuple(rows), self.mode, self.hash, current_player, cooldowns)
+
+    def check_consistency(self):
+        """
+        Проверяет, что хэш позиции, списки фигур и кэш горизонталей для снимков
+        соответствуют содержимому доски.
+
+        Raises:
+            ValueError: Если найдено расхождение.
+
+        Returns:
+            None
+        """
+        if self.hash != compute_hash(self.board):
+            raise ValueError("Position hash does not match the board.")
+        expected = {'white': {}, 'black': {}}
+        for x in range(8):
+            for y in range(8):
+                piece = self.board[x][y]
+                if piece is not None:
+                    expected[piece.color].setdefault(type(piece), set()).add((x, y))
+        for color in ('white', 'black'):
+            actual = {piece_type: squares for piece_type, squares in self.piece_squares[color].items() if squares}
+            if actual != expected[color]:
+                raise ValueError(f"Piece lists for {color} do not match the board.")
+        for x, row in enumerate(self._row_tuples):
+            if row is not None and row != tuple(self.board[x]):
+                raise ValueError(f"Cached snapshot row {x} does not match the board.")
+
+    def pieces(self, color):
+        """
+        Перебирает фигуры заданного цвета, не просматривая пустые клетки.
+
+        Args:
+            color (str): Цвет фигур. Возможные значения: 'white', 'black'.
+
+        Returns:
+            generator: Пары в формате ((x, y), фигура).
+        """
+        for squares in self.piece_squares[color].values():
+            for x, y in squares:
+                yield (x, y), self.board[x][y]
+
+    def count(self, color, piece_type):
+        """
+        Возвращает количество фигур заданного цвета и типа.
+
+        Args:
+            color (str): Цвет фигур. Возможные значения: 'white', 'black'.
+            piece_type (type): Класс фигуры, например Pawn.
+
+        Returns:
+            int: Количество фигур.
+        """
+        return len(self.piece_squares[color].get(piece_type, ()))
+
+    def king_square(self, color):
+        """
+        Возвращает клетку короля заданного цвета.
+
+        Args:
+            color (str): Цвет короля. Возможные значения: 'white', 'black'.
+
+        Returns:
+            tuple: Позиция короля в формате (x, y) или None, если короля нет на доске.
+        """
+        return next(iter(self.piece_squares[color].get(King, ())), None)
+
+    @staticmethod
+    def piece_moves(board, position, cooldown=None):
+        """
+        Генерирует ходы фигуры на заданной клетке без повторов.
+
+        Повторы убираются: Волшебник может получить соседнюю пустую клетку и шагом,
+        и телепортом, а Страж — соседнюю фигуру соперника и ходом ладьи, и блокировкой.
+
+        Args:
+            board: Доска в виде списка или кортежа горизонталей.
+            position (tuple): Позиция фигуры на доске в формате (x, y).
+            cooldown (int): Кулдаун телепортации Волшебника. Если указан, используется
+                            вместо кулдауна фигуры, и фигура не меняется.
+
+        Returns:
+            list: Список допустимых ходов в формате [(x1, y1), (x2, y2), ...].
+        """
+        x, y = position
+        piece = board[x][y]
+        if piece is None:
+            return []
+        if cooldown is None:
+            moves = piece.valid_moves(board, position)
+        else:
+            moves = piece.moves_with_cooldown(board, position, cooldown)
+        return list(dict.fromkeys(moves))
+
+    def generate_moves(self, color):
+        """
+        Генерирует ходы всех фигур заданного цвета без использования кэша (см. piece_moves).
+
+        Args:
+            color (str): Цвет фигур. Возможные значения: 'white', 'black'.
+
+        Returns:
+            dict: Ходы в формате {(x, y): [(x1, y1), ...]}.
+        """
+        return {position: self.piece_moves(self.board, position) for position, _ in self.pieces(color)}
+
+    def legal_moves(self, color):
+        """
+        Возвращает ходы всех фигур заданного цвета, используя кэш позиций.
+
+        Args:
+            color (str): Цвет фигур. Возможные значения: 'white', 'black'.
+
+        Returns:
+            dict: Ходы в формате {(x, y): [(x1, y1), ...]}. Результат не следует изменять.
+        """
+        # Ходы Волшебника на перезарядке зависят не только от расстановки, поэтому
+        # в таких позициях кэш не читается и не пополняется. Проверять нужно до генерации:
+        # Wizard.valid_moves уменьшает перезарядку.
+        if any(getattr(piece, 'teleport_cooldown', 0) for _, piece in self.pieces(color)):
+            return self.generate_moves(color)
+        key = (self.hash, color)
+        moves = self.move_cache.get(key)
+        if moves is None:
+            moves = self.generate_moves(color)
+            self.move_cache.put(key, moves)
+        return moves
+
+    def moves_from(self, position):
+        """
+        Возвращает допустимые ходы фигуры на заданной клетке.
+
+        Args:
+            position (tuple): Позиция фигуры на доске в формате (x, y).
+
+        Returns:
+            list: Список допустимых ходов в формате [(x1, y1), (x2, y2), ...].
+        """
+        x, y = position
+        piece = self.board[x][y]
+        if piece is None:
+            return []
+        return self.legal_moves(piece.color)[position]
 
     def display(self):
         """
@@ -97,13 +371,7 @@ class Board:
         Returns:
             None
         """
-        x, y = position
-        piece = self.board[x][y]
-        if piece is None:
-            self.hints = set()
-            return
-        valid_moves = piece.valid_moves(self.board, (x, y))
-        self.hints = valid_moves
+        self.hints = set(self.moves_from(position))
 
     def clear_hints(self):
         """
@@ -115,10 +383,84 @@ class Board:
         self.hints = set()
 
 
+class BoardSnapshot:
+    """
+    Класс, представляющий неизменяемый снимок доски для чтения из других потоков.
+
+    Фигуры в снимке общие с доской. Единственное изменяемое состояние фигур — кулдаун
+    телепортации Волшебника — хранится в снимке отдельно, и чтение снимка фигуры не меняет.
+    """
+
+    __slots__ = ('board', 'mode', 'hash', 'current_player', 'cooldowns')
+
+    def __init__(self, board, mode, hash, current_player=None, cooldowns=None):
+        """
+        Инициализирует снимок. Обычно создаётся методом Board.snapshot.
+
+        Args:
+            board (tuple): Доска в виде кортежа из 8 кортежей-горизонталей.
+            mode (str): Режим игры.
+            hash (int): Хэш расстановки фигур.
+            current_player (str): Игрок, чья очередь хода, или None.
+            cooldowns (dict): Кулдауны Волшебников в формате {(x, y): кулдаун}.
+                              Снимок хранит их копию, доступную только для чтения.
+        """
+        object.__setattr__(self, 'board', board)
+        object.__setattr__(self, 'mode', mode)
+        object.__setattr__(self, 'hash', hash)
+        object.__setattr__(self, 'current_player', current_player)
+        object.__setattr__(self, 'cooldowns', MappingProxyType(dict(cooldowns or {})))
+
+    def __setattr__(self, name, value):
+        """
+        Запрещает изменение снимка.
+
+        Raises:
+            AttributeError: Всегда.
+        """
+        raise AttributeError("BoardSnapshot is immutable")
+
+    def piece_at(self, position):
+        """
+        Возвращает фигуру на клетке.
+
+        Args:
+            position (tuple): Позиция на доске в формате (x, y).
+
+        Returns:
+            ChessPiece: Фигура или None.
+        """
+        x, y = position
+        return self.board[x][y]
+
+    def moves_from(self, position):
+        """
+        Возвращает допустимые ходы фигуры на заданной клетке в момент снимка.
+
+        Для Волшебника используется кулдаун из снимка; фигура не меняется.
+
+        Args:
+            position (tuple): Позиция фигуры на доске в формате (x, y).
+
+        Returns:
+            list: Список допустимых ходов в формате [(x1, y1), (x2, y2), ...].
+        """
+        return Board.piece_moves(self.board, position, self.cooldowns.get(position))
+
+    def placement(self):
+        """
+        Возвращает строку расстановки фигур (см. Board.load_placement).
+
+        Returns:
+            str: Строка расстановки.
+        """
+        return Board.placement(self)
+
+
 class Move:
     """Класс, представляющий ход в игре."""
 
-    def __init__(self, start_pos, end_pos, piece, captured_piece=None):
+    def __init__(self, start_pos, end_pos, piece, captured_piece=None, jumped_piece=None):
         """
         Инициализирует ход.
 
@@ -126,12 +468,14 @@ class Move:
             start_pos (tuple): Начальная позиция фигуры в формате (x, y).
             end_pos (tuple): Конечная позиция фигуры в формате (x, y).
             piece: Фигура, которая была перемещена.
-            captured_piece: Фигура, которая была взята (если есть).
+            captured_piece: Фигура, которая стояла на конечной клетке (если есть).
+            jumped_piece: Шашка, взятая прыжком через неё (если есть).
         """
         self.start_pos = start_pos
         self.end_pos = end_pos
         self.piece = piece
         self.captured_piece = captured_piece
+        self.jumped_piece = jumped_piece
 
 
 class ChessGame:
@@ -151,6 +495,60 @@ class ChessGame:
         self.mode = mode
         self.move_history = []
 
+    @classmethod
+    def from_position(cls, position):
+        """
+        Создаёт игру из текстовой позиции.
+
+        Позиция имеет формат '<режим> <расстановка> <очередь хода>', например
+        'chess rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w'.
+
+        Args:
+            position (str): Текстовая позиция.
+
+        Raises:
+            ValueError: Если позиция некорректна.
+
+        Returns:
+            ChessGame: Игра в заданной позиции.
+        """
+        parts = position.split()
+        if len(parts) != 3 or parts[2] not in ('w', 'b'):
+            raise ValueError(f"Invalid position: {position!r}.")
+        mode, placement, side = parts
+        game = cls(mode=mode)
+        game.board.load_placement(placement)
+        game.current_player = 'white' if side == 'w' else 'black'
+        return game
+
+    def position(self):
+        """
+        Возвращает текущую позицию в текстовом формате (см. from_position).
+
+        Returns:
+            str: Текстовая позиция.
+        """
+        side = 'w' if self.current_player == 'white' else 'b'
+        return f"{self.mode} {self.board.placement()} {side}"
+
+    def position_hash(self):
+        """
+        Возвращает хэш текущей позиции с учётом очереди хода.
+
+        Returns:
+            int: 64-битный хэш позиции.
+        """
+        return side_hash(self.board.hash, self.current_player)
+
+    def snapshot(self):
+        """
+        Возвращает неизменяемый снимок текущей позиции (см. Board.snapshot).
+
+        Returns:
+            BoardSnapshot: Снимок доски с очередью хода.
+        """
+        return self.board.snapshot(self.current_player)
+
     def play(self):
         """
         Запускает игровой цикл.
@@ -190,15 +588,13 @@ class ChessGame:
 
             start, end = move_input.split()
             if self.make_move(start, end):
-                self.move_count += 1
-                self.current_player = 'black' if self.current_player == 'white' else 'white'
                 self.board.clear_hints()
             else:
                 print("Invalid move, try again.")
 
     def make_move(self, start, end):
         """
-        Выполняет ход.
+        Выполняет ход и передаёт очередь хода сопернику.
 
         Args:
             start (str): Начальная позиция фигуры в формате 'e2'.
@@ -207,8 +603,21 @@ class ChessGame:
         Returns:
             bool: True, если ход выполнен успешно, иначе False.
         """
-        start_x, start_y = self.parse_position(start)
-        end_x, end_y = self.parse_position(end)
+        return self.apply_move(self.parse_position(start), self.parse_position(end))
+
+    def apply_move(self, start_pos, end_pos):
+        """
+        Выполняет ход, заданный координатами, и передаёт очередь хода сопернику.
+
+        Args:
+            start_pos (tuple): Начальная позиция фигуры в формате (x, y).
+            end_pos (tuple): Конечная позиция фигуры в формате (x, y).
+
+        Returns:
+            bool: True, если ход выполнен успешно, иначе False.
+        """
+        start_x, start_y = start_pos
+        end_x, end_y = end_pos
 
         if not (0 <= start_x < 8 and 0 <= start_y < 8 and 0 <= end_x < 8 and 0 <= end_y < 8):
             return False
@@ -217,15 +626,15 @@ class ChessGame:
         if piece is None or piece.color != self.current_player:
             return False
 
-        if (end_x, end_y) not in piece.valid_moves(self.board.board, (start_x, start_y)):
+        if (end_x, end_y) not in self.board.moves_from((start_x, start_y)):
             return False
 
         captured_piece = self.board.board[end_x][end_y]
         move = Move((start_x, start_y), (end_x, end_y), piece, captured_piece)
         self.move_history.append(move)
 
-        self.board.board[end_x][end_y] = piece
-        self.board.board[start_x][start_y] = None
+        self.board.set_piece(end_x, end_y, piece)
+        self.board.set_piece(start_x, start_y, None)
 
         if self.mode == "checkers":
             dx = end_x - start_x
@@ -233,8 +642,11 @@ class ChessGame:
             if abs(dx) == 2:
                 captured_x = start_x + dx // 2
                 captured_y = start_y + dy // 2
-                self.board.board[captured_x][captured_y] = None
+                move.jumped_piece = self.board.board[captured_x][captured_y]
+                self.board.set_piece(captured_x, captured_y, None)
 
+        self.move_count += 1
+        self.current_player = 'black' if self.current_player == 'white' else 'white'
         return True
 
     def undo_move(self):
@@ -253,8 +665,8 @@ class ChessGame:
         start_x, start_y = last_move.start_pos
         end_x, end_y = last_move.end_pos
 
-        self.board.board[start_x][start_y] = last_move.piece
-        self.board.board[end_x][end_y] = last_move.captured_piece
+        self.board.set_piece(start_x, start_y, last_move.piece)
+        self.board.set_piece(end_x, end_y, last_move.captured_piece)
 
         if self.mode == "checkers":
             dx = end_x - start_x
@@ -262,7 +674,7 @@ class ChessGame:
             if abs(dx) == 2:
                 captured_x = start_x + dx // 2
                 captured_y = start_y + dy // 2
-                self.board.board[captured_x][captured_y] = last_move.captured_piece
+                self.board.set_piece(captured_x, captured_y, last_move.jumped_piece)
 
         self.move_count -= 1
         self.current_player = 'black' if self.current_player == 'white' else 'white'
@@ -281,4 +693,17 @@ class ChessGame:
             return -1, -1
         x = 8 - int(position[1])
         y = ord(position[0]) - ord('a')
-        return x, y
\ No newline at end of file
+        return x, y
+
+    def format_position(self, position):
+        """
+        Преобразует координаты (x, y) в строковую позицию (например, 'e2').
+
+        Args:
+            position (tuple): Координаты клетки в формате (x, y).
+
+        Returns:
+            str: Позиция на доске в формате 'e2'.
+        """
+        x, y = position
+        return f"{chr(ord('a') + y)}{8 - x}"
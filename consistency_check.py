@@ -0,0 +1,107 @@
+import argparse
+import random
+import sys
+
+from board_and_game import ChessGame
+
+
+MODES = ("chess", "checkers", "modified_chess")
+
+
+def fuzz_game(mode, plies, rng):
+    """
+    Делает случайные ходы и откаты, проверяя согласованность доски после каждого шага.
+
+    Проверяются хэш позиции, списки фигур и кэш горизонталей (Board.check_consistency),
+    восстановление позиции после каждого отката (в том числе шашек, взятых прыжком),
+    неизменность снимков и возврат к начальной позиции после отката всех ходов.
+
+    Args:
+        mode (str): Режим игры.
+        plies (int): Количество шагов (ход или откат).
+        rng (random.Random): Генератор случайных чисел.
+
+    Raises:
+        ValueError: Если найдено расхождение.
+
+    Returns:
+        None
+    """
+    game = ChessGame(mode=mode)
+    # Позиции и снимки до каждого сделанного хода.
+    history = []
+    for step in range(plies):
+        moves = [
+            (start, end)
+            for start, ends in game.board.legal_moves(game.current_player).items()
+            for end in ends
+        ]
+        if history and (not moves or rng.random() < 0.3):
+            _undo_and_check(game, history, f"{mode}, step {step}")
+        elif moves:
+            history.append((game.position(), game.board.hash, game.snapshot()))
+            if not game.apply_move(*rng.choice(moves)):
+                raise ValueError(f"{mode}, step {step}: generated move was rejected.")
+        try:
+            game.board.check_consistency()
+        except ValueError as e:
+            raise ValueError(f"{mode}, step {step}: {e}") from e
+
+    while history:
+        _undo_and_check(game, history, f"{mode}, final undo")
+    game.board.check_consistency()
+
+
+def _undo_and_check(game, history, where):
+    """
+    Отменяет ход и сравнивает позицию с сохранённой до этого хода.
+
+    Args:
+        game (ChessGame): Игра.
+        history (list): Сохранённые позиции в формате [(позиция, хэш, снимок), ...].
+        where (str): Описание места проверки для сообщения об ошибке.
+
+    Raises:
+        ValueError: Если позиция не восстановилась или снимок изменился.
+
+    Returns:
+        None
+    """
+    position, board_hash, snapshot = history.pop()
+    game.undo_move()
+    if game.position() != position or game.board.hash != board_hash:
+        raise ValueError(f"{where}: undo did not restore {position!r}, got {game.position()!r}.")
+    if snapshot.placement() != position.split()[1]:
+        raise ValueError(f"{where}: a snapshot changed after it was taken.")
+
+
+def main(argv=None):
+    """
+    Точка входа командной строки.
+
+    Args:
+        argv (list): Аргументы командной строки. По умолчанию sys.argv[1:].
+
+    Returns:
+        int: Код завершения: 1, если найдено расхождение, иначе 0.
+    """
+    parser = argparse.ArgumentParser(description="Fuzz make/undo and check incremental board state.")
+    parser.add_argument("--games", type=int, default=20, help="games per mode")
+    parser.add_argument("--plies", type=int, default=200, help="make/undo steps per game")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    rng = random.Random(args.seed)
+    try:
+        for mode in MODES:
+            for _ in range(args.games):
+                fuzz_game(mode, args.plies, rng)
+    except ValueError as e:
+        print(f"FAILED: {e}", file=sys.stderr)
+        return 1
+    print(f"OK: {args.games * len(MODES)} games, {args.plies} steps each")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
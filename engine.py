@@ -0,0 +1,215 @@
+import json
+import os
+
+from board_and_game import PIECE_CLASSES
+
+
+# Ценность фигур в сантипешках по символу белой фигуры. Король не оценивается:
+# его взятие означает конец игры.
+PIECE_VALUES = {
+    'P': 100, 'N': 320, 'B': 330, 'R': 500, 'Q': 900, 'K': 0,
+    'W': 300, 'H': 350, 'G': 500, 'C': 100,
+}
+
+# Ценность фигур по их классу, для подсчёта материала по спискам фигур доски.
+TYPE_VALUES = {piece_class: PIECE_VALUES[symbol] for symbol, piece_class in PIECE_CLASSES.items()}
+
+# Бонусы за клетки по классу фигуры: 64 значения с точки зрения белых (клетка x * 8 + y),
+# для чёрных таблица отражается по вертикали. Пусто, пока не загружен файл весов.
+PIECE_SQUARE = {}
+
+# Вес разницы в количестве ходов сторон (может быть дробным). 0 — подвижность не учитывается.
+MOBILITY_WEIGHT = 0
+
+WIN_SCORE = 100000
+
+# Переменная окружения с путём к файлу весов, загружаемому при импорте модуля.
+WEIGHTS_ENV = "CHESS_EVAL_WEIGHTS"
+
+
+def load_weights(path):
+    """
+    Загружает веса оценки из файла, созданного tuning.py.
+
+    Args:
+        path (str): Путь к файлу весов в формате JSON.
+
+    Returns:
+        None
+    """
+    global MOBILITY_WEIGHT
+    with open(path, encoding="utf-8") as f:
+        weights = json.load(f)
+    PIECE_VALUES.update(weights.get("piece_values", {}))
+    TYPE_VALUES.update({PIECE_CLASSES[symbol]: value for symbol, value in PIECE_VALUES.items()})
+    PIECE_SQUARE.clear()
+    for symbol, table in weights.get("piece_square", {}).items():
+        if len(table) != 64:
+            raise ValueError(f"Piece-square table for {symbol!r} must have 64 values.")
+        PIECE_SQUARE[PIECE_CLASSES[symbol]] = table
+    MOBILITY_WEIGHT = weights.get("mobility", 0)
+
+
+def perft(game, depth):
+    """
+    Подсчитывает количество позиций на заданной глубине перебора.
+
+    Args:
+        game (ChessGame): Игра, позиция которой исследуется. После вызова позиция не меняется.
+        depth (int): Глубина перебора в полуходах.
+
+    Returns:
+        int: Количество листовых позиций.
+
+    Raises:
+        ValueError: Если глубина отрицательна.
+    """
+    if depth < 0:
+        raise ValueError("Perft depth must be non-negative.")
+    if depth == 0:
+        return 1
+    nodes = 0
+    for start, ends in game.board.legal_moves(game.current_player).items():
+        if depth == 1:
+            nodes += len(ends)
+            continue
+        for end in ends:
+            game.apply_move(start, end)
+            nodes += perft(game, depth - 1)
+            game.undo_move()
+    return nodes
+
+
+def is_lost(game):
+    """
+    Проверяет, проиграл ли игрок, чья очередь хода.
+
+    Игрок проигрывает, если в шахматных режимах у него взят король,
+    или если у него нет ни одного хода.
+
+    Args:
+        game (ChessGame): Игра.
+
+    Returns:
+        bool: True, если игрок проиграл, иначе False.
+    """
+    board = game.board
+    if board.mode != "checkers" and board.king_square(game.current_player) is None:
+        return True
+    return not any(board.legal_moves(game.current_player).values())
+
+
+def evaluate(game):
+    """
+    Оценивает позицию с точки зрения игрока, чья очередь хода.
+
+    Учитываются материал, бонусы за клетки и подвижность (последние два — если
+    загружены веса, см. load_weights).
+
+    Args:
+        game (ChessGame): Игра.
+
+    Returns:
+        int: Оценка в сантипешках (положительная — в пользу ходящего).
+    """
+    board = game.board
+    score = 0
+    for color, sign in (('white', 1), ('black', -1)):
+        for piece_type, squares in board.piece_squares[color].items():
+            score += sign * TYPE_VALUES[piece_type] * len(squares)
+            table = PIECE_SQUARE.get(piece_type)
+            if table is not None:
+                for x, y in squares:
+                    score += sign * table[(x if color == 'white' else 7 - x) * 8 + y]
+    if MOBILITY_WEIGHT:
+        mobility = sum(map(len, board.legal_moves('white').values())) - \
+            sum(map(len, board.legal_moves('black').values()))
+        score += round(MOBILITY_WEIGHT * mobility)
+    return score if game.current_player == 'white' else -score
+
+
+def _ordered_moves(game):
+    """
+    Возвращает ходы ходящего игрока, взятия — первыми (по ценности взятой фигуры).
+
+    Args:
+        game (ChessGame): Игра.
+
+    Returns:
+        list: Список ходов в формате [((x, y), (x1, y1)), ...].
+    """
+    board = game.board.board
+    moves = [
+        (start, end)
+        for start, ends in game.board.legal_moves(game.current_player).items()
+        for end in ends
+    ]
+
+    def capture_value(move):
+        target = board[move[1][0]][move[1][1]]
+        return PIECE_VALUES[target.symbol.upper()] if target is not None else 0
+
+    moves.sort(key=capture_value, reverse=True)
+    return moves
+
+
+def _negamax(game, depth, alpha, beta):
+    """
+    Перебор с альфа-бета отсечением.
+
+    Args:
+        game (ChessGame): Игра.
+        depth (int): Оставшаяся глубина в полуходах.
+        alpha (int): Нижняя граница оценки.
+        beta (int): Верхняя граница оценки.
+
+    Returns:
+        int: Оценка позиции с точки зрения ходящего игрока.
+    """
+    if is_lost(game):
+        return -WIN_SCORE - depth
+    if depth == 0:
+        return evaluate(game)
+    for start, end in _ordered_moves(game):
+        game.apply_move(start, end)
+        score = -_negamax(game, depth - 1, -beta, -alpha)
+        game.undo_move()
+        if score >= beta:
+            return score
+        alpha = max(alpha, score)
+    return alpha
+
+
+def search(game, depth):
+    """
+    Ищет лучший ход перебором с альфа-бета отсечением.
+
+    Args:
+        game (ChessGame): Игра. После вызова позиция не меняется.
+        depth (int): Глубина перебора в полуходах (не меньше 1).
+
+    Returns:
+        tuple: Оценка с точки зрения ходящего и лучший ход в формате (score, ((x, y), (x1, y1))).
+               Если ходов нет, ход равен None.
+
+    Raises:
+        ValueError: Если глубина меньше 1.
+    """
+    if depth < 1:
+        raise ValueError("Search depth must be at least 1.")
+    if is_lost(game):
+        return -WIN_SCORE - depth, None
+    alpha, beta = -WIN_SCORE * 2, WIN_SCORE * 2
+    best_move = None
+    for start, end in _ordered_moves(game):
+        game.apply_move(start, end)
+        score = -_negamax(game, depth - 1, -beta, -alpha)
+        game.undo_move()
+        if best_move is None or score > alpha:
+            alpha = score
+            best_move = (start, end)
+    return alpha, best_move
+
+
+if os.environ.get(WEIGHTS_ENV):
+    load_weights(os.environ[WEIGHTS_ENV])
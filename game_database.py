@@ -0,0 +1,517 @@
+import json
+import mmap
+import os
+import struct
+import sys
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import Counter, OrderedDict
+
+from board_and_game import ChessGame
+from position_hash import MODE_KEYS
+
+
+MODES = ("chess", "checkers", "modified_chess")
+RESULTS = ("*", "1-0", "0-1", "1/2-1/2")
+
+# Заголовок файлов частей: сигнатура, версия, количество партий и количество ходов (записей индекса).
+_HEADER = struct.Struct("<4sHxxII")
+_GAMES_MAGIC = b"CGDG"
+_INDEX_MAGIC = b"CGDI"
+_VERSION = 1
+
+# Начиная с Python 3.13 mmap в Unix может не дублировать дескриптор файла.
+_MMAP_OPTIONS = {"trackfd": False} if sys.version_info >= (3, 13) and sys.platform != "win32" else {}
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+
+def open_chunk_limit():
+    """
+    Возвращает максимальное количество одновременно открытых частей базы.
+
+    Если отображения не держат дескрипторы файлов, ограничения нет. Иначе каждая часть
+    держит два дескриптора, и частям отводится половина лимита процесса (RLIMIT_NOFILE).
+
+    Returns:
+        int: Количество частей или None, если ограничения нет.
+    """
+    if _MMAP_OPTIONS:
+        return None
+    if resource is None:
+        return GameDatabase.DEFAULT_OPEN_CHUNKS
+    soft, _ = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if soft == resource.RLIM_INFINITY:
+        return None
+    return max(16, soft // 4)
+
+
+def pack_move(start_pos, end_pos):
+    """
+    Упаковывает ход в 16-битное число: 6 бит начальной клетки и 6 бит конечной.
+
+    Args:
+        start_pos (tuple): Начальная позиция фигуры в формате (x, y).
+        end_pos (tuple): Конечная позиция фигуры в формате (x, y).
+
+    Returns:
+        int: Упакованный ход.
+    """
+    return (start_pos[0] * 8 + start_pos[1]) << 6 | (end_pos[0] * 8 + end_pos[1])
+
+
+def unpack_move(packed):
+    """
+    Распаковывает ход, упакованный функцией pack_move.
+
+    Args:
+        packed (int): Упакованный ход.
+
+    Returns:
+        tuple: Ход в формате ((x, y), (x1, y1)).
+    """
+    start, end = packed >> 6, packed & 63
+    return (start >> 3, start & 7), (end >> 3, end & 7)
+
+
+def position_key(game):
+    """
+    Возвращает ключ позиции для индекса: хэш с учётом очереди хода и режима игры.
+
+    Args:
+        game (ChessGame): Игра.
+
+    Returns:
+        int: 64-битный ключ позиции.
+    """
+    return game.position_hash() ^ MODE_KEYS[game.mode]
+
+
+class ChunkReader:
+    """Класс для чтения одной части базы через отображение файлов в память."""
+
+    def __init__(self, games_path, index_path):
+        """
+        Открывает файлы части базы.
+
+        Args:
+            games_path (str): Путь к файлу партий.
+            index_path (str): Путь к файлу индекса.
+        """
+        self._maps = []
+
+        games = self._map(games_path, _GAMES_MAGIC)
+        _, _, self.game_count, move_count = _HEADER.unpack_from(games)
+        offset = _HEADER.size
+        self.offsets = games[offset:offset + 4 * (self.game_count + 1)].cast("I")
+        offset += 4 * (self.game_count + 1)
+        self.moves = games[offset:offset + 2 * move_count].cast("H")
+        offset += 2 * move_count
+        self.modes = games[offset:offset + self.game_count]
+        offset += self.game_count
+        self.results = games[offset:offset + self.game_count]
+
+        index = self._map(index_path, _INDEX_MAGIC)
+        _, _, _, entry_count = _HEADER.unpack_from(index)
+        offset = _HEADER.size
+        self.keys = index[offset:offset + 8 * entry_count].cast("Q")
+        offset += 8 * entry_count
+        self.game_ids = index[offset:offset + 4 * entry_count].cast("I")
+        offset += 4 * entry_count
+        self.plies = index[offset:offset + 2 * entry_count].cast("H")
+
+    def _map(self, path, magic):
+        """
+        Отображает файл в память и проверяет заголовок.
+
+        Args:
+            path (str): Путь к файлу.
+            magic (bytes): Ожидаемая сигнатура.
+
+        Raises:
+            ValueError: Если файл не является частью базы.
+
+        Returns:
+            memoryview: Содержимое файла.
+        """
+        # Отображение остаётся действительным после закрытия файла.
+        with open(path, "rb") as file:
+            mapped = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ, **_MMAP_OPTIONS)
+        self._maps.append(mapped)
+        view = memoryview(mapped)
+        signature, version, _, _ = _HEADER.unpack_from(view)
+        if signature != magic or version != _VERSION:
+            raise ValueError(f"{path} is not a game database file.")
+        return view
+
+    def find(self, key):
+        """
+        Ищет позицию в индексе части.
+
+        Args:
+            key (int): Ключ позиции.
+
+        Returns:
+            list: Вхождения в формате [(номер партии в базе, полуход), ...].
+        """
+        lo = bisect_left(self.keys, key)
+        hi = bisect_right(self.keys, key, lo)
+        return [(self.game_ids[i], self.plies[i]) for i in range(lo, hi)]
+
+    def close(self):
+        """
+        Закрывает файлы части.
+
+        Returns:
+            None
+        """
+        for name in ("offsets", "moves", "modes", "results", "keys", "game_ids", "plies"):
+            getattr(self, name).release()
+        for mapped in self._maps:
+            mapped.close()
+
+
+class GameDatabase:
+    """Класс, представляющий базу сыгранных партий с индексом по позициям."""
+
+    DEFAULT_CHUNK_SIZE = 4096
+
+    # Количество одновременно открытых частей, если лимит дескрипторов процесса неизвестен.
+    DEFAULT_OPEN_CHUNKS = 128
+
+    def __init__(self, path, chunk_size=DEFAULT_CHUNK_SIZE):
+        """
+        Открывает базу в каталоге или создаёт новую.
+
+        Партии хранятся частями по chunk_size партий. Каждая часть состоит из файла
+        партий (столбцы смещений, ходов, режимов и результатов) и файла индекса
+        (ключи позиций, отсортированные вместе с номерами партий и полуходами).
+
+        Args:
+            path (str): Каталог базы.
+            chunk_size (int): Количество партий в части. Для существующей базы
+                              используется значение, с которым она была создана.
+        """
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+        manifest_path = os.path.join(path, "manifest.json")
+        if os.path.exists(manifest_path):
+            with open(manifest_path, encoding="utf-8") as f:
+                manifest = json.load(f)
+            self.chunk_size = manifest["chunk_size"]
+            self.game_count = manifest["games"]
+        else:
+            self.chunk_size = chunk_size
+            self.game_count = 0
+        self._readers = OrderedDict()
+        self._max_readers = open_chunk_limit()
+        self._reset_pending()
+        if self.game_count % self.chunk_size:
+            self._load_pending(self.game_count // self.chunk_size)
+
+    def __enter__(self):
+        """
+        Возвращает базу для использования в конструкции with.
+
+        Returns:
+            GameDatabase: Эта база.
+        """
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        """
+        Закрывает базу при выходе из конструкции with.
+
+        Returns:
+            None
+        """
+        self.close()
+
+    def __len__(self):
+        """
+        Возвращает количество партий в базе.
+
+        Returns:
+            int: Количество партий.
+        """
+        return self.game_count
+
+    def add_game(self, mode, moves, result="*"):
+        """
+        Добавляет партию, проигрывая её ходы через ChessGame.
+
+        Args:
+            mode (str): Режим игры: 'chess', 'checkers' или 'modified_chess'.
+            moves (list): Ходы в формате ['e2e4', ...] или [((x, y), (x1, y1)), ...].
+            result (str): Результат партии: '1-0', '0-1', '1/2-1/2' или '*'.
+
+        Raises:
+            ValueError: Если режим, результат или один из ходов некорректен.
+
+        Returns:
+            int: Номер добавленной партии.
+        """
+        if mode not in MODES:
+            raise ValueError(f"Invalid mode: {mode!r}.")
+        if result not in RESULTS:
+            raise ValueError(f"Invalid result: {result!r}.")
+        game = ChessGame(mode=mode)
+        game_id = self.game_count
+        packed = array("H")
+        entries = [(position_key(game), game_id, 0)]
+        for ply, move in enumerate(moves, start=1):
+            if isinstance(move, str):
+                start_pos, end_pos = game.parse_position(move[:2]), game.parse_position(move[2:])
+            else:
+                start_pos, end_pos = move
+            if not game.apply_move(start_pos, end_pos):
+                raise ValueError(f"Illegal move {move!r} at ply {ply} of game {game_id}.")
+            packed.append(pack_move(start_pos, end_pos))
+            entries.append((position_key(game), game_id, ply))
+
+        self._pending_modes.append(MODES.index(mode))
+        self._pending_results.append(RESULTS.index(result))
+        self._pending_moves.extend(packed)
+        self._pending_offsets.append(len(self._pending_moves))
+        self._pending_entries.extend(entries)
+        self.game_count += 1
+        if len(self._pending_modes) == self.chunk_size:
+            self.flush()
+            self._reset_pending()
+        return game_id
+
+    def get_game(self, game_id):
+        """
+        Возвращает сохранённую партию.
+
+        Args:
+            game_id (int): Номер партии.
+
+        Raises:
+            IndexError: Если партии с таким номером нет.
+
+        Returns:
+            tuple: Режим, результат и ходы в формате (mode, result, [((x, y), (x1, y1)), ...]).
+        """
+        if not 0 <= game_id < self.game_count:
+            raise IndexError(f"No game with id {game_id}.")
+        chunk_id, local = divmod(game_id, self.chunk_size)
+        if chunk_id == self._pending_chunk:
+            offsets, moves = self._pending_offsets, self._pending_moves
+            mode, result = self._pending_modes[local], self._pending_results[local]
+        else:
+            reader = self._reader(chunk_id)
+            offsets, moves = reader.offsets, reader.moves
+            mode, result = reader.modes[local], reader.results[local]
+        packed = moves[offsets[local]:offsets[local + 1]]
+        return MODES[mode], RESULTS[result], [unpack_move(move) for move in packed]
+
+    def replay(self, game_id, ply=None):
+        """
+        Восстанавливает партию до заданного полухода.
+
+        Args:
+            game_id (int): Номер партии.
+            ply (int): Количество ходов, которые нужно сделать. По умолчанию — все.
+
+        Returns:
+            ChessGame: Игра в позиции после заданного полухода.
+        """
+        mode, _, moves = self.get_game(game_id)
+        game = ChessGame(mode=mode)
+        for start_pos, end_pos in moves[:ply]:
+            game.apply_move(start_pos, end_pos)
+        return game
+
+    def find_position(self, game):
+        """
+        Ищет все партии, в которых встречалась позиция.
+
+        Args:
+            game (ChessGame): Игра в искомой позиции (учитываются режим и очередь хода).
+
+        Returns:
+            list: Вхождения в формате [(номер партии, полуход), ...], упорядоченные по номеру партии.
+        """
+        key = position_key(game)
+        hits = []
+        for chunk_id in range(self._pending_chunk):
+            hits.extend(self._reader(chunk_id).find(key))
+        hits.extend((game_id, ply) for entry_key, game_id, ply in self._pending_entries if entry_key == key)
+        return sorted(hits)
+
+    def move_statistics(self, game):
+        """
+        Собирает статистику ходов, сделанных из позиции.
+
+        Args:
+            game (ChessGame): Игра в искомой позиции.
+
+        Returns:
+            dict: Статистика в формате {'e2e4': {'games': n, '1-0': n, '0-1': n, '1/2-1/2': n, '*': n}, ...}.
+        """
+        key = position_key(game)
+        counts = Counter()
+        for chunk_id in range(self._pending_chunk + 1):
+            if chunk_id == self._pending_chunk:
+                hits = [(game_id, ply) for entry_key, game_id, ply in self._pending_entries if entry_key == key]
+            else:
+                hits = self._reader(chunk_id).find(key)
+            if not hits:
+                continue
+            offsets, moves, results = self._columns(chunk_id)
+            first_id = chunk_id * self.chunk_size
+            for game_id, ply in hits:
+                local = game_id - first_id
+                index = offsets[local] + ply
+                if index < offsets[local + 1]:
+                    counts[moves[index], results[local]] += 1
+
+        stats = {}
+        for (packed, result), count in counts.items():
+            start_pos, end_pos = unpack_move(packed)
+            name = game.format_position(start_pos) + game.format_position(end_pos)
+            counter = stats.setdefault(name, {"games": 0, **{r: 0 for r in RESULTS}})
+            counter["games"] += count
+            counter[RESULTS[result]] += count
+        return stats
+
+    def _columns(self, chunk_id):
+        """
+        Возвращает столбцы смещений, ходов и результатов части.
+
+        Args:
+            chunk_id (int): Номер части.
+
+        Returns:
+            tuple: Смещения ходов партий, упакованные ходы и коды результатов.
+        """
+        if chunk_id == self._pending_chunk:
+            return self._pending_offsets, self._pending_moves, self._pending_results
+        reader = self._reader(chunk_id)
+        return reader.offsets, reader.moves, reader.results
+
+    def flush(self):
+        """
+        Записывает незаписанные партии на диск.
+
+        Returns:
+            None
+        """
+        if self._pending_modes:
+            self._write_chunk()
+        manifest_path = os.path.join(self.path, "manifest.json")
+        with open(manifest_path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump({"chunk_size": self.chunk_size, "games": self.game_count}, f)
+        os.replace(manifest_path + ".tmp", manifest_path)
+
+    def close(self):
+        """
+        Записывает незаписанные партии и закрывает файлы базы.
+
+        Returns:
+            None
+        """
+        self.flush()
+        for reader in self._readers.values():
+            reader.close()
+        self._readers.clear()
+
+    def _chunk_paths(self, chunk_id):
+        """
+        Возвращает пути к файлам части.
+
+        Args:
+            chunk_id (int): Номер части.
+
+        Returns:
+            tuple: Пути к файлу партий и файлу индекса.
+        """
+        name = os.path.join(self.path, f"chunk_{chunk_id:06d}")
+        return name + ".games", name + ".index"
+
+    def _reader(self, chunk_id):
+        """
+        Возвращает (открывая при необходимости) читателя части.
+
+        Поиск перебирает части по порядку, и при вытеснении давно использованных частей
+        каждый проход открывал бы все части заново. Поэтому при превышении лимита
+        закрывается последняя использованная часть: остальные остаются открытыми между проходами.
+
+        Args:
+            chunk_id (int): Номер части.
+
+        Returns:
+            ChunkReader: Читатель части.
+        """
+        reader = self._readers.get(chunk_id)
+        if reader is None:
+            if self._max_readers is not None and len(self._readers) >= self._max_readers:
+                self._readers.popitem(last=True)[1].close()
+            reader = ChunkReader(*self._chunk_paths(chunk_id))
+            self._readers[chunk_id] = reader
+        else:
+            self._readers.move_to_end(chunk_id)
+        return reader
+
+    def _reset_pending(self):
+        """
+        Начинает новую часть в памяти.
+
+        Returns:
+            None
+        """
+        self._pending_chunk = self.game_count // self.chunk_size
+        self._pending_offsets = array("I", [0])
+        self._pending_moves = array("H")
+        self._pending_modes = array("B")
+        self._pending_results = array("B")
+        self._pending_entries = []
+
+    def _load_pending(self, chunk_id):
+        """
+        Загружает неполную последнюю часть в память, чтобы продолжить её заполнение.
+
+        Args:
+            chunk_id (int): Номер части.
+
+        Returns:
+            None
+        """
+        reader = ChunkReader(*self._chunk_paths(chunk_id))
+        try:
+            self._pending_offsets = array("I", reader.offsets)
+            self._pending_moves = array("H", reader.moves)
+            self._pending_modes = array("B", reader.modes)
+            self._pending_results = array("B", reader.results)
+            self._pending_entries = list(zip(reader.keys, reader.game_ids, reader.plies))
+        finally:
+            reader.close()
+
+    def _write_chunk(self):
+        """
+        Записывает текущую часть (партии и отсортированный индекс) на диск.
+
+        Returns:
+            None
+        """
+        games_path, index_path = self._chunk_paths(self._pending_chunk)
+        with open(games_path + ".tmp", "wb") as f:
+            f.write(_HEADER.pack(_GAMES_MAGIC, _VERSION, len(self._pending_modes), len(self._pending_moves)))
+            self._pending_offsets.tofile(f)
+            self._pending_moves.tofile(f)
+            self._pending_modes.tofile(f)
+            self._pending_results.tofile(f)
+
+        self._pending_entries.sort()
+        with open(index_path + ".tmp", "wb") as f:
+            f.write(_HEADER.pack(_INDEX_MAGIC, _VERSION, 0, len(self._pending_entries)))
+            array("Q", (entry[0] for entry in self._pending_entries)).tofile(f)
+            array("I", (entry[1] for entry in self._pending_entries)).tofile(f)
+            array("H", (entry[2] for entry in self._pending_entries)).tofile(f)
+
+        os.replace(games_path + ".tmp", games_path)
+        os.replace(index_path + ".tmp", index_path)
@@ -0,0 +1,593 @@
+import argparse
+import math
+import multiprocessing
+import random
+import sys
+import time
+
+from board_and_game import ChessGame
+from engine import PIECE_VALUES
+
+
+# Компактное представление доски: список из 64 чисел, клетка (x, y) имеет номер x * 8 + y.
+# Белые фигуры — положительные коды, чёрные — отрицательные, пустая клетка — 0.
+EMPTY, PAWN, KNIGHT, BISHOP, ROOK, QUEEN, KING, WIZARD, HUNTER, GUARDIAN = range(10)
+
+CODES = {'P': PAWN, 'N': KNIGHT, 'B': BISHOP, 'R': ROOK, 'Q': QUEEN, 'K': KING,
+         'W': WIZARD, 'H': HUNTER, 'G': GUARDIAN}
+
+CODE_VALUES = [0] * 10
+for _symbol, _code in CODES.items():
+    CODE_VALUES[_code] = PIECE_VALUES[_symbol]
+
+WHITE, BLACK = 1, -1
+
+ORTHOGONAL = [(1, 0), (-1, 0), (0, 1), (0, -1)]
+DIAGONAL = [(1, 1), (1, -1), (-1, 1), (-1, -1)]
+KNIGHT_STEPS = [(2, 1), (2, -1), (-2, 1), (-2, -1), (1, 2), (1, -2), (-1, 2), (-1, -2)]
+
+
+def _steps(square, offsets):
+    """
+    Возвращает клетки на доске, смещённые от заданной на один шаг.
+
+    Args:
+        square (int): Номер клетки.
+        offsets (list): Смещения в формате [(dx, dy), ...].
+
+    Returns:
+        tuple: Номера клеток.
+    """
+    x, y = divmod(square, 8)
+    return tuple((x + dx) * 8 + y + dy for dx, dy in offsets if 0 <= x + dx < 8 and 0 <= y + dy < 8)
+
+
+def _rays(square, directions):
+    """
+    Возвращает лучи клеток от заданной клетки до края доски.
+
+    Args:
+        square (int): Номер клетки.
+        directions (list): Направления в формате [(dx, dy), ...].
+
+    Returns:
+        tuple: Кортежи номеров клеток, по одному на направление.
+    """
+    x, y = divmod(square, 8)
+    rays = []
+    for dx, dy in directions:
+        ray = []
+        nx, ny = x + dx, y + dy
+        while 0 <= nx < 8 and 0 <= ny < 8:
+            ray.append(nx * 8 + ny)
+            nx += dx
+            ny += dy
+        if ray:
+            rays.append(tuple(ray))
+    return tuple(rays)
+
+
+KNIGHT_TARGETS = [_steps(s, KNIGHT_STEPS) for s in range(64)]
+KING_TARGETS = [_steps(s, ORTHOGONAL + DIAGONAL) for s in range(64)]
+DIAGONAL_TARGETS = [_steps(s, DIAGONAL) for s in range(64)]
+ORTHOGONAL_RAYS = [_rays(s, ORTHOGONAL) for s in range(64)]
+DIAGONAL_RAYS = [_rays(s, DIAGONAL) for s in range(64)]
+ALL_RAYS = [ORTHOGONAL_RAYS[s] + DIAGONAL_RAYS[s] for s in range(64)]
+
+
+def from_game(game):
+    """
+    Переводит позицию игры в компактное представление.
+
+    Args:
+        game (ChessGame): Игра в режиме 'modified_chess' или 'chess'.
+
+    Raises:
+        ValueError: Если режим игры не поддерживается.
+
+    Returns:
+        tuple: Доска и сторона, чья очередь хода, в формате (list, int).
+    """
+    if game.mode == "checkers":
+        raise ValueError("MCTS supports 'modified_chess' and 'chess' only.")
+    board = [EMPTY] * 64
+    for (x, y), piece in list(game.board.pieces('white')) + list(game.board.pieces('black')):
+        code = CODES[piece.symbol.upper()]
+        board[x * 8 + y] = code if piece.color == 'white' else -code
+    return board, WHITE if game.current_player == 'white' else BLACK
+
+
+def generate_moves(board, side):
+    """
+    Генерирует ходы стороны по тем же правилам, что и классы фигур.
+
+    Телепорт Волшебника доступен всегда: в игре перезарядка телепорта не включается.
+
+    Args:
+        board (list): Компактная доска.
+        side (int): Сторона: WHITE или BLACK.
+
+    Returns:
+        list: Ходы в формате from * 64 + to.
+    """
+    moves = []
+    append = moves.append
+    for square in range(64):
+        code = board[square] * side
+        if code <= 0:
+            continue
+        base = square * 64
+        if code == PAWN:
+            x, y = divmod(square, 8)
+            step = -8 if side == WHITE else 8
+            ahead = square + step
+            if 0 <= ahead < 64:
+                if board[ahead] == EMPTY:
+                    append(base + ahead)
+                    if (x == 6 and side == WHITE) or (x == 1 and side == BLACK):
+                        if board[ahead + step] == EMPTY:
+                            append(base + ahead + step)
+                for dy in (-1, 1):
+                    if 0 <= y + dy < 8 and board[ahead + dy] * side < 0:
+                        append(base + ahead + dy)
+        elif code == KNIGHT or code == KING:
+            for target in (KNIGHT_TARGETS if code == KNIGHT else KING_TARGETS)[square]:
+                if board[target] * side <= 0:
+                    append(base + target)
+        elif code == WIZARD:
+            for target in KING_TARGETS[square]:
+                if board[target] * side < 0:
+                    append(base + target)
+            for target in range(64):
+                if board[target] == EMPTY:
+                    append(base + target)
+        elif code == HUNTER:
+            for target in KNIGHT_TARGETS[square]:
+                if board[target] * side <= 0:
+                    append(base + target)
+            for target in DIAGONAL_TARGETS[square]:
+                if board[target] * side < 0:
+                    append(base + target)
+        else:
+            if code == BISHOP:
+                rays = DIAGONAL_RAYS[square]
+            elif code == QUEEN:
+                rays = ALL_RAYS[square]
+            else:
+                rays = ORTHOGONAL_RAYS[square]
+            for ray in rays:
+                for target in ray:
+                    value = board[target] * side
+                    if value == 0:
+                        append(base + target)
+                        continue
+                    if value < 0:
+                        append(base + target)
+                    break
+            if code == GUARDIAN:
+                for target in DIAGONAL_TARGETS[square]:
+                    if board[target] * side < 0:
+                        append(base + target)
+    return moves
+
+
+def make_move(board, move):
+    """
+    Выполняет ход на компактной доске на месте.
+
+    Args:
+        board (list): Компактная доска.
+        move (int): Ход в формате from * 64 + to.
+
+    Returns:
+        int: Код взятой фигуры (0, если взятия не было) — для unmake_move.
+    """
+    start, end = divmod(move, 64)
+    captured = board[end]
+    board[end] = board[start]
+    board[start] = EMPTY
+    return captured
+
+
+def unmake_move(board, move, captured):
+    """
+    Отменяет ход, выполненный make_move.
+
+    Args:
+        board (list): Компактная доска.
+        move (int): Ход в формате from * 64 + to.
+        captured (int): Значение, которое вернул make_move.
+
+    Returns:
+        None
+    """
+    start, end = divmod(move, 64)
+    board[start] = board[end]
+    board[end] = captured
+
+
+def playout(board, side, max_plies=200, rng=random):
+    """
+    Доигрывает партию случайными ходами и возвращает результат для белых.
+
+    Взятие короля выбирается всегда, когда оно возможно. Игрок без ходов проигрывает.
+    Если партия не закончилась за max_plies полуходов, результат оценивается по материалу.
+
+    Args:
+        board (list): Компактная доска. Изменяется на месте.
+        side (int): Сторона, чья очередь хода.
+        max_plies (int): Максимальная длина доигрывания.
+        rng: Генератор случайных чисел.
+
+    Returns:
+        float: Результат для белых от 0 до 1.
+    """
+    if KING * side not in board:
+        return 0.0 if side == WHITE else 1.0
+    for _ in range(max_plies):
+        moves = generate_moves(board, side)
+        if not moves:
+            return 0.0 if side == WHITE else 1.0
+        enemy_king = -KING * side
+        for move in moves:
+            if board[move % 64] == enemy_king:
+                return 1.0 if side == WHITE else 0.0
+        make_move(board, moves[int(rng.random() * len(moves))])
+        side = -side
+    material = sum(CODE_VALUES[code] if code > 0 else -CODE_VALUES[-code] for code in board)
+    return 1.0 / (1.0 + 10 ** (-material / 400))
+
+
+def playout_batch(jobs, max_plies=200):
+    """
+    Выполняет доигрывания в процессе пула.
+
+    Args:
+        jobs (list): Позиции в формате [(bytes доски, сторона), ...].
+        max_plies (int): Максимальная длина доигрывания.
+
+    Returns:
+        list: Результаты для белых в том же порядке.
+    """
+    return [playout(list(_decode(data)), side, max_plies) for data, side in jobs]
+
+
+def _encode(board):
+    """
+    Упаковывает доску в 64 байта для передачи между процессами.
+
+    Args:
+        board (list): Компактная доска.
+
+    Returns:
+        bytes: Упакованная доска.
+    """
+    return bytes(code & 0xFF for code in board)
+
+
+def _decode(data):
+    """
+    Распаковывает доску, упакованную функцией _encode.
+
+    Args:
+        data (bytes): Упакованная доска.
+
+    Returns:
+        generator: Коды клеток.
+    """
+    return (byte - 256 if byte > 127 else byte for byte in data)
+
+
+class Node:
+    """Класс, представляющий узел дерева поиска."""
+
+    __slots__ = ('move', 'parent', 'children', 'untried', 'visits', 'wins', 'side')
+
+    def __init__(self, move, parent, side):
+        """
+        Инициализирует узел.
+
+        Args:
+            move (int): Ход, ведущий в узел (None для корня).
+            parent (Node): Родительский узел.
+            side (int): Сторона, чья очередь хода в позиции узла.
+        """
+        self.move = move
+        self.parent = parent
+        self.children = []
+        self.untried = None
+        self.visits = 0
+        self.wins = 0.0
+        self.side = side
+
+    def select_child(self, exploration):
+        """
+        Выбирает потомка по формуле UCT.
+
+        Выигрыши потомка хранятся с точки зрения стороны, сделавшей ход в него.
+
+        Args:
+            exploration (float): Коэффициент исследования.
+
+        Returns:
+            Node: Выбранный потомок.
+        """
+        log_visits = math.log(self.visits)
+        return max(
+            self.children,
+            key=lambda child: child.wins / child.visits + exploration * math.sqrt(log_visits / child.visits),
+        )
+
+
+class MCTSPlayer:
+    """Класс игрока, выбирающего ход поиском по дереву методом Монте-Карло (UCT)."""
+
+    def __init__(self, max_playouts=2000, time_limit=None, workers=0, batch_size=32,
+                 exploration=1.4, max_plies=200, seed=None):
+        """
+        Инициализирует игрока.
+
+        Args:
+            max_playouts (int): Максимальное количество доигрываний на ход (None — без ограничения).
+            time_limit (float): Время на ход в секундах (None — без ограничения).
+            workers (int): Количество процессов для доигрываний; 0 — доигрывать в текущем процессе.
+            batch_size (int): Количество листьев, отправляемых процессам за один раз.
+            exploration (float): Коэффициент исследования UCT.
+            max_plies (int): Максимальная длина доигрывания.
+            seed (int): Зерно генератора случайных чисел.
+
+        Raises:
+            ValueError: Если не задано ни одно ограничение или параметры вне допустимых значений.
+        """
+        if max_playouts is None and time_limit is None:
+            raise ValueError("Set max_playouts, time_limit or both.")
+        if max_playouts is not None and max_playouts < 1:
+            raise ValueError("max_playouts must be at least 1.")
+        if time_limit is not None and time_limit <= 0:
+            raise ValueError("time_limit must be positive.")
+        if workers < 0 or batch_size < 1:
+            raise ValueError("workers must be non-negative and batch_size at least 1.")
+        self.max_playouts = max_playouts
+        self.time_limit = time_limit
+        self.workers = workers
+        self.batch_size = batch_size if workers else 1
+        self.exploration = exploration
+        self.max_plies = max_plies
+        self.rng = random.Random(seed)
+        # Каждый процесс заново инициализирует генератор, иначе после fork доигрывания совпадут.
+        self.pool = multiprocessing.Pool(workers, initializer=random.seed) if workers else None
+        self.root = None
+        self._root_board = None
+        self._history_length = 0
+        self.last_stats = {}
+
+    def __enter__(self):
+        """
+        Возвращает игрока для использования в конструкции with.
+
+        Returns:
+            MCTSPlayer: Этот игрок.
+        """
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        """
+        Останавливает процессы при выходе из конструкции with.
+
+        Returns:
+            None
+        """
+        self.close()
+
+    def close(self):
+        """
+        Останавливает процессы доигрываний.
+
+        Returns:
+            None
+        """
+        if self.pool is not None:
+            self.pool.close()
+            self.pool.join()
+            self.pool = None
+
+    def choose_move(self, game):
+        """
+        Выбирает ход для текущей позиции игры.
+
+        Дерево, построенное на предыдущих ходах, переиспользуется, если с тех пор в игре
+        были сделаны ходы, уже исследованные в дереве.
+
+        Args:
+            game (ChessGame): Игра. Не изменяется.
+
+        Returns:
+            tuple: Ход в формате ((x, y), (x1, y1)) или None, если ходов нет.
+        """
+        board, side = from_game(game)
+        self._reuse_tree(game, board, side)
+        root = self.root
+        if root.untried is None:
+            root.untried = generate_moves(board, side)
+            self.rng.shuffle(root.untried)
+        if not root.untried and not root.children:
+            return None
+
+        started = time.monotonic()
+        playouts = 0
+        # Хотя бы один батч выполняется всегда, даже если время истекло до начала поиска.
+        while playouts == 0 or ((self.max_playouts is None or playouts < self.max_playouts) and
+                                (self.time_limit is None or time.monotonic() - started < self.time_limit)):
+            batch = self.batch_size if self.max_playouts is None else \
+                min(self.batch_size, self.max_playouts - playouts)
+            leaves = [self._select(board) for _ in range(batch)]
+            if self.pool is not None:
+                jobs = [(_encode(leaf_board), leaf.side) for leaf, leaf_board in leaves]
+                parts = [(jobs[i::self.workers], self.max_plies) for i in range(self.workers)]
+                part_results = self.pool.starmap(playout_batch, parts)
+                results = [None] * len(jobs)
+                for i, part in enumerate(part_results):
+                    results[i::self.workers] = part
+            else:
+                results = [playout(leaf_board, leaf.side, self.max_plies, self.rng) for leaf, leaf_board in leaves]
+            for (leaf, _), result in zip(leaves, results):
+                self._backpropagate(leaf, result)
+            playouts += len(leaves)
+
+        elapsed = time.monotonic() - started
+        best = max(root.children, key=lambda child: child.visits)
+        self.last_stats = {
+            "playouts": playouts,
+            "seconds": elapsed,
+            "playouts_per_second": playouts / elapsed if elapsed > 0 else 0.0,
+            "root_visits": root.visits,
+            "best_visits": best.visits,
+            "best_score": best.wins / best.visits,
+        }
+        start, end = divmod(best.move, 64)
+        return divmod(start, 8), divmod(end, 8)
+
+    def _reuse_tree(self, game, board, side):
+        """
+        Переводит корень дерева в текущую позицию по ходам, сделанным с прошлого вызова,
+        или начинает новое дерево.
+
+        Args:
+            game (ChessGame): Игра.
+            board (list): Компактная доска текущей позиции.
+            side (int): Сторона, чья очередь хода.
+
+        Returns:
+            None
+        """
+        node = self.root
+        history = game.move_history
+        if node is not None and len(history) >= self._history_length:
+            for move in history[self._history_length:]:
+                (sx, sy), (ex, ey) = move.start_pos, move.end_pos
+                packed = (sx * 8 + sy) * 64 + ex * 8 + ey
+                node = next((child for child in node.children if child.move == packed), None)
+                if node is None:
+                    break
+        if node is None or node.side != side or self._root_board_after(node) != board:
+            node = Node(None, None, side)
+        node.parent = None
+        self.root = node
+        self._root_board = list(board)
+        self._history_length = len(history)
+
+    def _root_board_after(self, node):
+        """
+        Восстанавливает доску узла, применяя ходы от прежнего корня.
+
+        Args:
+            node (Node): Узел дерева.
+
+        Returns:
+            list: Компактная доска позиции узла.
+        """
+        path = []
+        while node is not self.root and node is not None:
+            path.append(node.move)
+            node = node.parent
+        board = list(self._root_board)
+        for move in reversed(path):
+            make_move(board, move)
+        return board
+
+    def _select(self, board):
+        """
+        Спускается по дереву до листа, раскрывая один новый узел.
+
+        По пути узлы получают «виртуальное поражение» (увеличение посещений без выигрышей),
+        чтобы листья одной партии отличались друг от друга.
+
+        Args:
+            board (list): Компактная доска корня. Не изменяется.
+
+        Returns:
+            tuple: Лист и копия доски в его позиции.
+        """
+        board = list(board)
+        node = self.root
+        node.visits += 1
+        while True:
+            if node.untried is None:
+                node.untried = generate_moves(board, node.side)
+                self.rng.shuffle(node.untried)
+            if node.untried:
+                move = node.untried.pop()
+                captured = make_move(board, move)
+                child = Node(move, node, -node.side)
+                if captured == KING or captured == -KING:
+                    child.untried = []
+                node.children.append(child)
+                child.visits += 1
+                return child, board
+            if not node.children:
+                return node, board
+            node = node.select_child(self.exploration)
+            make_move(board, node.move)
+            node.visits += 1
+
+    def _backpropagate(self, node, result):
+        """
+        Добавляет результат доигрывания узлам от листа до корня.
+
+        Args:
+            node (Node): Лист.
+            result (float): Результат для белых от 0 до 1.
+
+        Returns:
+            None
+        """
+        while node is not None:
+            # Выигрыши узла считаются для стороны, сделавшей ход в него.
+            node.wins += result if node.side == BLACK else 1.0 - result
+            node = node.parent
+
+
+def main(argv=None):
+    """
+    Играет партию MCTS против самого себя и выводит скорость доигрываний.
+
+    Args:
+        argv (list): Аргументы командной строки. По умолчанию sys.argv[1:].
+
+    Returns:
+        int: Код завершения.
+    """
+    parser = argparse.ArgumentParser(description="MCTS self-play for modified chess.")
+    parser.add_argument("--moves", type=int, default=10, help="number of plies to play")
+    parser.add_argument("--playouts", type=int, default=None, help="playout budget per move")
+    parser.add_argument("--time", type=float, default=None, help="time budget per move in seconds")
+    parser.add_argument("-j", "--workers", type=int, default=0, help="worker processes (0: in-process)")
+    parser.add_argument("--batch-size", type=int, default=32, help="leaves sent to workers at once")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args(argv)
+
+    game = ChessGame(mode="modified_chess")
+    max_playouts = 500 if args.playouts is None and args.time is None else args.playouts
+    try:
+        player = MCTSPlayer(max_playouts=max_playouts, time_limit=args.time, workers=args.workers,
+                            batch_size=args.batch_size, seed=args.seed)
+    except ValueError as e:
+        parser.error(str(e))
+    with player:
+        for _ in range(args.moves):
+            move = player.choose_move(game)
+            if move is None:
+                break
+            stats = player.last_stats
+            print(f"{game.current_player}: {game.format_position(move[0])}{game.format_position(move[1])}  "
+                  f"score {stats['best_score']:.3f}  {stats['playouts']} playouts  "
+                  f"{stats['playouts_per_second']:.0f} playouts/s  tree {stats['root_visits']}")
+            game.apply_move(*move)
+            if game.board.king_square(game.current_player) is None:
+                break
+    game.board.display()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
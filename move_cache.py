@@ -0,0 +1,74 @@
+from collections import OrderedDict
+
+
+class MoveCache:
+    """Класс, представляющий LRU-кэш списков ходов, ключом служит хэш позиции."""
+
+    DEFAULT_SIZE = 4096
+
+    def __init__(self, max_size=DEFAULT_SIZE):
+        """
+        Инициализирует кэш ходов.
+
+        Args:
+            max_size (int): Максимальное количество хранимых позиций.
+                            По умолчанию DEFAULT_SIZE.
+        """
+        if max_size < 1:
+            raise ValueError("Cache size must be positive.")
+        self.max_size = max_size
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        """
+        Возвращает количество позиций в кэше.
+
+        Returns:
+            int: Количество позиций.
+        """
+        return len(self.entries)
+
+    def get(self, key):
+        """
+        Возвращает ходы для позиции и помечает её как недавно использованную.
+
+        Args:
+            key (tuple): Ключ позиции в формате (хэш, цвет).
+
+        Returns:
+            dict: Ходы в формате {(x, y): [(x1, y1), ...]} или None, если позиции нет в кэше.
+        """
+        moves = self.entries.get(key)
+        if moves is None:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return moves
+
+    def put(self, key, moves):
+        """
+        Сохраняет ходы для позиции, вытесняя самую давно использованную при переполнении.
+
+        Args:
+            key (tuple): Ключ позиции в формате (хэш, цвет).
+            moves (dict): Ходы в формате {(x, y): [(x1, y1), ...]}.
+
+        Returns:
+            None
+        """
+        self.entries[key] = moves
+        self.entries.move_to_end(key)
+        if len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+
+    def clear(self):
+        """
+        Очищает кэш.
+
+        Returns:
+            None
+        """
+        self.entries.clear()
@@ -18,9 +18,28 @@ class Wizard(ChessPiece):
         """
         Возвращает список допустимых ходов для Волшебника.
 
+        Каждый вызов при ненулевом кулдауне уменьшает его на 1.
+
+        Args:
+            board (list): Игровая доска в виде двумерного списка.
+            position (tuple): Текущая позиция фигуры на доске в формате (x, y).
+
+        Returns:
+            list: Список допустимых ходов в формате [(x1, y1), (x2, y2), ...].
+        """
+        moves = self.moves_with_cooldown(board, position, self.teleport_cooldown)
+        if self.teleport_cooldown:
+            self.teleport_cooldown -= 1
+        return moves
+
+    def moves_with_cooldown(self, board, position, cooldown):
+        """
+        Возвращает список допустимых ходов для Волшебника при заданном кулдауне, не меняя фигуру.
+
         Args:
             board (list): Игровая доска в виде двумерного списка.
             position (tuple): Текущая позиция фигуры на доске в формате (x, y).
+            cooldown (int): Кулдаун телепортации.
 
         Returns:
             list: Список допустимых ходов в формате [(x1, y1), (x2, y2), ...].
@@ -38,13 +57,11 @@ class Wizard(ChessPiece):
                     if self.is_empty(target) or self.is_opponent(target):
                         moves.append((nx, ny))
 
-        if self.teleport_cooldown == 0:
+        if cooldown == 0:
             for i in range(8):
                 for j in range(8):
                     if board[i][j] is None:
                         moves.append((i, j))
-        else:
-            self.teleport_cooldown -= 1
 
         return moves
 
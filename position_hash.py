@@ -0,0 +1,65 @@
+import random
+
+
+# Фиксированное зерно: ключи одинаковы во всех процессах и запусках,
+# поэтому хэши позиций можно сохранять на диск и передавать между процессами.
+_rng = random.Random(0x5EED_C4E55)
+
+PIECE_SYMBOLS = "PNBRQKWHGCpnbrqkwhgc"
+
+PIECE_KEYS = {
+    symbol: [[_rng.getrandbits(64) for _ in range(8)] for _ in range(8)]
+    for symbol in PIECE_SYMBOLS
+}
+
+SIDE_KEY = _rng.getrandbits(64)
+
+MODE_KEYS = {mode: _rng.getrandbits(64) for mode in ("chess", "checkers", "modified_chess")}
+
+
+def piece_key(piece, x, y):
+    """
+    Возвращает ключ Зобриста для фигуры на клетке.
+
+    Args:
+        piece (ChessPiece): Фигура или None.
+        x (int): Номер строки доски.
+        y (int): Номер столбца доски.
+
+    Returns:
+        int: 64-битный ключ, для пустой клетки 0.
+    """
+    if piece is None:
+        return 0
+    return PIECE_KEYS[piece.symbol][x][y]
+
+
+def compute_hash(board):
+    """
+    Вычисляет хэш расстановки фигур с нуля.
+
+    Args:
+        board (list): Игровая доска в виде двумерного списка.
+
+    Returns:
+        int: 64-битный хэш позиции (без учёта очереди хода).
+    """
+    value = 0
+    for x in range(8):
+        for y in range(8):
+            value ^= piece_key(board[x][y], x, y)
+    return value
+
+
+def side_hash(board_hash, player):
+    """
+    Добавляет к хэшу расстановки очередь хода.
+
+    Args:
+        board_hash (int): Хэш расстановки фигур.
+        player (str): Игрок, который ходит. Возможные значения: 'white', 'black'.
+
+    Returns:
+        int: Хэш позиции с учётом очереди хода.
+    """
+    return board_hash ^ SIDE_KEY if player == 'black' else board_hash
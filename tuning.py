@@ -0,0 +1,315 @@
+import argparse
+import json
+import math
+import multiprocessing
+import sys
+import time
+from itertools import islice
+
+import numpy as np
+
+from board_and_game import ChessGame
+from engine import PIECE_VALUES
+
+
+# Порядок типов фигур в признаках.
+FEATURE_SYMBOLS = "PNBRQKWHGC"
+
+# Признаки: разница количества фигур каждого типа, занятость клеток каждым типом
+# (для чёрных — с отражением по вертикали) и разница количества ходов сторон.
+MATERIAL_OFFSET = 0
+SQUARE_OFFSET = MATERIAL_OFFSET + len(FEATURE_SYMBOLS)
+MOBILITY_OFFSET = SQUARE_OFFSET + 64 * len(FEATURE_SYMBOLS)
+FEATURE_COUNT = MOBILITY_OFFSET + 1
+
+RESULTS = {"1-0": 1.0, "0-1": 0.0, "1/2-1/2": 0.5}
+
+# Масштаб логистической функции: перевес в scale сантипешек соответствует шансам 10 к 1.
+DEFAULT_SCALE = 400.0
+
+
+def parse_line(line):
+    """
+    Разбирает строку набора данных: позицию и результат партии.
+
+    Строка имеет формат '<режим> <расстановка> <очередь хода> <результат>', где результат —
+    '1-0', '0-1', '1/2-1/2' или число от 0 до 1 (очки белых).
+
+    Args:
+        line (str): Строка набора данных.
+
+    Raises:
+        ValueError: Если строка некорректна.
+
+    Returns:
+        tuple: Игра и результат для белых в формате (ChessGame, float).
+    """
+    position, _, result = line.strip().rpartition(" ")
+    label = RESULTS[result] if result in RESULTS else float(result)
+    if not 0.0 <= label <= 1.0:
+        raise ValueError(f"Invalid result: {result!r}.")
+    return ChessGame.from_position(position), label
+
+
+def features(game):
+    """
+    Вычисляет признаки позиции с точки зрения белых.
+
+    Args:
+        game (ChessGame): Игра.
+
+    Returns:
+        numpy.ndarray: Вектор признаков длины FEATURE_COUNT (int16).
+    """
+    row = np.zeros(FEATURE_COUNT, dtype=np.int16)
+    board = game.board
+    for color, sign in (('white', 1), ('black', -1)):
+        for (x, y), piece in board.pieces(color):
+            kind = FEATURE_SYMBOLS.index(piece.symbol.upper())
+            row[MATERIAL_OFFSET + kind] += sign
+            row[SQUARE_OFFSET + kind * 64 + (x if color == 'white' else 7 - x) * 8 + y] += sign
+    row[MOBILITY_OFFSET] = sum(map(len, board.generate_moves('white').values())) - \
+        sum(map(len, board.generate_moves('black').values()))
+    return row
+
+
+def featurize_lines(lines):
+    """
+    Вычисляет признаки и метки для группы строк набора данных в процессе пула.
+
+    Некорректные строки пропускаются.
+
+    Args:
+        lines (list): Строки набора данных.
+
+    Returns:
+        tuple: Матрица признаков (int16) и вектор меток (float32).
+    """
+    rows, labels = [], []
+    for line in lines:
+        try:
+            game, label = parse_line(line)
+        except (ValueError, KeyError):
+            continue
+        rows.append(features(game))
+        labels.append(label)
+    matrix = np.stack(rows) if rows else np.zeros((0, FEATURE_COUNT), dtype=np.int16)
+    return matrix, np.asarray(labels, dtype=np.float32)
+
+
+def build_dataset(source, prefix, workers=None, chunk_size=1024, progress=sys.stderr):
+    """
+    Переводит текстовый набор данных в файлы признаков и меток на диске.
+
+    Создаются файлы '<prefix>.features' (int16, строка на позицию), '<prefix>.labels' (float32)
+    и '<prefix>.json' с размерами. Память ограничена количеством одновременно обрабатываемых групп.
+
+    Args:
+        source: Текстовый поток со строками набора данных.
+        prefix (str): Путь к файлам без расширения.
+        workers (int): Количество процессов. По умолчанию — число ядер.
+        chunk_size (int): Количество строк в одной задаче процесса.
+        progress: Поток для сообщений о прогрессе.
+
+    Returns:
+        int: Количество записанных позиций.
+    """
+    workers = workers or multiprocessing.cpu_count()
+    lines = (line for line in source if line.strip() and not line.startswith('#'))
+    count = 0
+    started = time.monotonic()
+    with multiprocessing.Pool(workers) as pool, \
+            open(prefix + ".features", "wb") as features_file, \
+            open(prefix + ".labels", "wb") as labels_file:
+        while True:
+            chunks = [list(islice(lines, chunk_size)) for _ in range(workers * 4)]
+            chunks = [chunk for chunk in chunks if chunk]
+            if not chunks:
+                break
+            for matrix, labels in pool.map(featurize_lines, chunks):
+                matrix.tofile(features_file)
+                labels.tofile(labels_file)
+                count += len(labels)
+            elapsed = time.monotonic() - started
+            rate = count / elapsed if elapsed > 0 else 0.0
+            print(f"{count} positions, {rate:.0f} positions/s", file=progress, flush=True)
+    with open(prefix + ".json", "w", encoding="utf-8") as f:
+        json.dump({"positions": count, "features": FEATURE_COUNT}, f)
+    return count
+
+
+def load_dataset(prefix):
+    """
+    Открывает файлы признаков и меток через отображение в память.
+
+    Args:
+        prefix (str): Путь к файлам без расширения (см. build_dataset).
+
+    Raises:
+        ValueError: Если набор данных пуст или построен с другим набором признаков.
+
+    Returns:
+        tuple: Матрица признаков и вектор меток (numpy.memmap).
+    """
+    with open(prefix + ".json", encoding="utf-8") as f:
+        shape = json.load(f)
+    if shape["features"] != FEATURE_COUNT:
+        raise ValueError("Dataset was built with a different feature layout.")
+    count = shape["positions"]
+    if count == 0:
+        raise ValueError(f"Dataset {prefix!r} is empty.")
+    matrix = np.memmap(prefix + ".features", dtype=np.int16, mode="r", shape=(count, FEATURE_COUNT))
+    labels = np.memmap(prefix + ".labels", dtype=np.float32, mode="r", shape=(count,))
+    return matrix, labels
+
+
+def initial_weights():
+    """
+    Возвращает начальные веса: текущая ценность фигур и нулевые остальные признаки.
+
+    Returns:
+        numpy.ndarray: Вектор весов длины FEATURE_COUNT.
+    """
+    weights = np.zeros(FEATURE_COUNT, dtype=np.float64)
+    for kind, symbol in enumerate(FEATURE_SYMBOLS):
+        weights[MATERIAL_OFFSET + kind] = PIECE_VALUES[symbol]
+    return weights
+
+
+def train(matrix, labels, epochs=10, batch_size=16384, learning_rate=1.0, l2=1e-4,
+          scale=DEFAULT_SCALE, seed=0, progress=sys.stderr):
+    """
+    Подбирает веса логистической регрессией (метод Texel) с оптимизатором Adam.
+
+    Предсказанные очки белых равны 1 / (1 + 10 ** (-X @ w / scale)). Мини-батчи читаются
+    с диска подряд идущими блоками в случайном порядке, поэтому в памяти одновременно
+    находится только один батч.
+
+    Args:
+        matrix: Матрица признаков (например, из load_dataset).
+        labels: Вектор меток.
+        epochs (int): Количество проходов по данным.
+        batch_size (int): Размер мини-батча.
+        learning_rate (float): Шаг Adam в сантипешках.
+        l2 (float): Коэффициент L2-регуляризации (материал не регуляризуется).
+        scale (float): Масштаб логистической функции.
+        seed (int): Зерно генератора порядка батчей.
+        progress: Поток для сообщений о прогрессе.
+
+    Raises:
+        ValueError: Если набор данных пуст.
+
+    Returns:
+        numpy.ndarray: Вектор весов длины FEATURE_COUNT.
+    """
+    if len(labels) == 0:
+        raise ValueError("Dataset is empty.")
+    weights = initial_weights()
+    regularized = np.ones(FEATURE_COUNT)
+    regularized[MATERIAL_OFFSET:SQUARE_OFFSET] = 0.0
+    first, second = np.zeros(FEATURE_COUNT), np.zeros(FEATURE_COUNT)
+    beta1, beta2, eps = 0.9, 0.999, 1e-8
+    factor = math.log(10) / scale
+    rng = np.random.default_rng(seed)
+    starts = np.arange(0, len(labels), batch_size)
+    step = 0
+
+    for epoch in range(1, epochs + 1):
+        total_loss = 0.0
+        for start in rng.permutation(starts):
+            x = np.asarray(matrix[start:start + batch_size], dtype=np.float64)
+            y = np.asarray(labels[start:start + batch_size], dtype=np.float64)
+            p = 1.0 / (1.0 + np.exp(-factor * (x @ weights)))
+            p = np.clip(p, 1e-12, 1 - 1e-12)
+            total_loss -= np.sum(y * np.log(p) + (1 - y) * np.log(1 - p))
+
+            gradient = factor * (x.T @ (p - y)) / len(y) + l2 * regularized * weights
+            step += 1
+            first = beta1 * first + (1 - beta1) * gradient
+            second = beta2 * second + (1 - beta2) * gradient ** 2
+            corrected_first = first / (1 - beta1 ** step)
+            corrected_second = second / (1 - beta2 ** step)
+            weights -= learning_rate * corrected_first / (np.sqrt(corrected_second) + eps)
+        print(f"epoch {epoch}: log loss {total_loss / len(labels):.5f}", file=progress, flush=True)
+    return weights
+
+
+def weights_to_json(weights):
+    """
+    Переводит вектор весов в формат файла весов для engine.load_weights.
+
+    Ценность фигур и бонусы за клетки округляются до целых сантипешек. Вес подвижности
+    остаётся дробным: типичные значения меньше одной сантипешки за ход.
+
+    Args:
+        weights (numpy.ndarray): Вектор весов длины FEATURE_COUNT.
+
+    Returns:
+        dict: Веса в формате {'piece_values': ..., 'piece_square': ..., 'mobility': ...}.
+    """
+    rounded = np.rint(weights).astype(int).tolist()
+    return {
+        "piece_values": {
+            symbol: rounded[MATERIAL_OFFSET + kind] for kind, symbol in enumerate(FEATURE_SYMBOLS)
+        },
+        "piece_square": {
+            symbol: rounded[SQUARE_OFFSET + kind * 64:SQUARE_OFFSET + (kind + 1) * 64]
+            for kind, symbol in enumerate(FEATURE_SYMBOLS)
+        },
+        "mobility": float(weights[MOBILITY_OFFSET]),
+    }
+
+
+def main(argv=None):
+    """
+    Точка входа командной строки.
+
+    Args:
+        argv (list): Аргументы командной строки. По умолчанию sys.argv[1:].
+
+    Returns:
+        int: Код завершения.
+    """
+    parser = argparse.ArgumentParser(description="Fit evaluation weights from labelled positions.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    build_parser = commands.add_parser("featurize", help="convert labelled positions to feature files")
+    build_parser.add_argument("input", help="file with '<position> <result>' per line ('-' for stdin)")
+    build_parser.add_argument("prefix", help="output path without extension")
+    build_parser.add_argument("-j", "--workers", type=int, default=None, help="number of worker processes")
+    build_parser.add_argument("--chunk-size", type=int, default=1024, help="lines per worker task")
+
+    train_parser = commands.add_parser("train", help="fit weights and write a weight file")
+    train_parser.add_argument("prefix", help="feature files path without extension")
+    train_parser.add_argument("-o", "--output", default="weights.json", help="weight file to write")
+    train_parser.add_argument("--epochs", type=int, default=10)
+    train_parser.add_argument("--batch-size", type=int, default=16384)
+    train_parser.add_argument("--lr", type=float, default=1.0, help="Adam step size in centipawns")
+    train_parser.add_argument("--l2", type=float, default=1e-4)
+    train_parser.add_argument("--scale", type=float, default=DEFAULT_SCALE)
+    train_parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    if args.command == "featurize":
+        source = sys.stdin if args.input == "-" else open(args.input, encoding="utf-8")
+        try:
+            build_dataset(source, args.prefix, workers=args.workers, chunk_size=args.chunk_size)
+        finally:
+            if source is not sys.stdin:
+                source.close()
+        return 0
+
+    try:
+        matrix, labels = load_dataset(args.prefix)
+    except ValueError as e:
+        parser.error(str(e))
+    weights = train(matrix, labels, epochs=args.epochs, batch_size=args.batch_size,
+                    learning_rate=args.lr, l2=args.l2, scale=args.scale, seed=args.seed)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(weights_to_json(weights), f, indent=2)
+    print(f"weights written to {args.output}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())